@@ -0,0 +1,80 @@
+from importlib.metadata import PackageNotFoundError, version
+from typing import Dict, Hashable, Iterable, Optional
+
+from fit_tool.data_message import DataMessage
+from fit_tool.definition_message import DefinitionMessage
+from fit_tool.fit_file_builder import FitFileBuilder
+from fit_tool.record import Record
+
+# The definition-reuse fast path appends to FitFileBuilder's records directly, so it
+# is only enabled on fit_tool releases that test_fit.py has shown to encode
+# byte-identical files; any other release goes through builder.add for every message.
+VERIFIED_FIT_TOOL_VERSIONS = ("0.9.16",)
+
+try:
+    REUSE_DEFINITIONS = version("fit-tool") in VERIFIED_FIT_TOOL_VERSIONS
+except PackageNotFoundError:
+    REUSE_DEFINITIONS = False
+
+if REUSE_DEFINITIONS:
+    from fit_tool.validation import validate_message_header
+
+
+def add_with_layout(
+    builder: FitFileBuilder,
+    message: DataMessage,
+    layout: Hashable,
+    definitions: Dict[Hashable, DefinitionMessage],
+) -> None:
+    """``builder.add`` that reuses the active definition for a repeated field layout.
+
+    ``layout`` must identify which fields of ``message`` are set. When the builder
+    is still emitting the definition recorded for that layout, the message is
+    appended directly instead of deriving and validating a fresh definition. Any
+    other case goes through ``builder.add``, so the encoded file is unchanged.
+    """
+    if not REUSE_DEFINITIONS:
+        builder.add(message)
+        return
+
+    key = (message.global_id, layout)
+    definition = definitions.get(key)
+    if definition is not None and builder.definition_map.get(message.local_id) is definition:
+        validate_message_header(message)
+        message.set_definition_message(definition)
+        builder.records.append(Record.from_message(message))
+        return
+
+    builder.add(message)
+    definitions[key] = builder.definition_map[message.local_id]
+
+
+def add_all_with_layout(
+    builder: FitFileBuilder,
+    messages: Iterable[DataMessage],
+    layout: Hashable,
+    definitions: Optional[Dict[Hashable, DefinitionMessage]] = None,
+) -> None:
+    """``add_with_layout`` for a run of messages that all share ``layout``.
+
+    Only the first message goes through ``add_with_layout``; the rest reuse the
+    definition it resolved and are appended to the builder in one ``extend``.
+    """
+    if not REUSE_DEFINITIONS:
+        builder.add_all(list(messages))
+        return
+
+    messages = iter(messages)
+    first = next(messages, None)
+    if first is None:
+        return
+
+    add_with_layout(builder, first, layout, {} if definitions is None else definitions)
+    definition = builder.definition_map[first.local_id]
+
+    def to_record(message: DataMessage) -> Record:
+        validate_message_header(message)
+        message.set_definition_message(definition)
+        return Record.from_message(message)
+
+    builder.records.extend(map(to_record, messages))
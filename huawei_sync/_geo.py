@@ -0,0 +1,102 @@
+import math
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the NumPy path below is used instead
+    njit = None
+
+
+EARTH_RADIUS_M = 6371000
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Great-circle distance in meters; accepts scalars or NumPy arrays."""
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    delta_phi = np.radians(np.subtract(lat2, lat1))
+    delta_lambda = np.radians(np.subtract(lon2, lon1))
+
+    a = (
+        np.sin(delta_phi / 2) ** 2
+        + np.cos(phi1) * np.cos(phi2) * np.sin(delta_lambda / 2) ** 2
+    )
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return EARTH_RADIUS_M * c
+
+
+def _track_distance_speed_numpy(
+    lat: np.ndarray, lon: np.ndarray, timestamps: np.ndarray, max_speed: float
+) -> tuple[np.ndarray, np.ndarray]:
+    deltas = haversine_m(lat[:-1], lon[:-1], lat[1:], lon[1:])
+    dts = np.diff(timestamps)
+    raw_speeds = np.divide(deltas, dts, out=np.zeros_like(deltas), where=dts > 0)
+    # Non-increasing timestamps and GPS jumps contribute no speed or distance
+    valid = (dts > 0) & (raw_speeds <= max_speed)
+
+    distances = np.concatenate(([0.0], np.cumsum(np.where(valid, deltas, 0.0))))
+    speeds = np.concatenate(([0.0], np.where(valid, raw_speeds, 0.0)))
+    return distances, speeds
+
+
+def _track_distance_speed_loop(lat, lon, timestamps, max_speed):
+    n = lat.shape[0]
+    distances = np.zeros(n)
+    speeds = np.zeros(n)
+    if n == 0:
+        return distances, speeds
+
+    # cos(phi) is carried over from the previous point, so each step needs one cos
+    prev_phi = math.radians(lat[0])
+    prev_cos_phi = math.cos(prev_phi)
+    for idx in range(1, n):
+        distances[idx] = distances[idx - 1]
+        phi = math.radians(lat[idx])
+        cos_phi = math.cos(phi)
+        phi1 = prev_phi
+        cos_phi1 = prev_cos_phi
+        prev_phi = phi
+        prev_cos_phi = cos_phi
+
+        dt = timestamps[idx] - timestamps[idx - 1]
+        if dt <= 0:
+            continue
+
+        delta_phi = math.radians(lat[idx] - lat[idx - 1])
+        delta_lambda = math.radians(lon[idx] - lon[idx - 1])
+        a = (
+            math.sin(delta_phi / 2) ** 2
+            + cos_phi1 * cos_phi * math.sin(delta_lambda / 2) ** 2
+        )
+        delta = EARTH_RADIUS_M * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+        speed = delta / dt
+        if speed > max_speed:
+            continue
+        speeds[idx] = speed
+        distances[idx] += delta
+    return distances, speeds
+
+
+if njit is not None:
+    _track_distance_speed_kernel = njit(cache=True)(_track_distance_speed_loop)
+else:
+    _track_distance_speed_kernel = _track_distance_speed_numpy
+
+
+def track_distance_speed(
+    lat: np.ndarray, lon: np.ndarray, timestamps: np.ndarray, max_speed: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """Cumulative distance and per-point speed along a track.
+
+    Steps with non-increasing timestamps or a speed above ``max_speed`` add no
+    distance and report zero speed. Uses a single compiled pass when numba is
+    installed.
+    """
+    return _track_distance_speed_kernel(
+        np.ascontiguousarray(lat, dtype=np.float64),
+        np.ascontiguousarray(lon, dtype=np.float64),
+        np.ascontiguousarray(timestamps, dtype=np.float64),
+        float(max_speed),
+    )
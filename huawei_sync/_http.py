@@ -0,0 +1,34 @@
+from functools import lru_cache
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+STRAVA_POOL_SIZE = 4
+
+
+@lru_cache(maxsize=1)
+def strava_session() -> requests.Session:
+    """Process-wide session for Strava calls, so TCP/TLS connections are reused.
+
+    Failed connects and 429/503 responses are retried with exponential backoff
+    (honouring ``Retry-After``); in all of those Strava never processed the request,
+    so retrying a POST cannot upload or exchange a code twice. Read errors and other
+    statuses are not retried, and error responses are returned for the caller's
+    ``raise_for_status``.
+    """
+    retry = Retry(
+        total=3,
+        read=False,
+        backoff_factor=0.5,
+        status_forcelist=(429, 503),
+        allowed_methods=None,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=STRAVA_POOL_SIZE, pool_maxsize=STRAVA_POOL_SIZE, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    return session
@@ -0,0 +1,100 @@
+import csv
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Collection, Dict, FrozenSet, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:  # pyarrow is optional; pandas' C parser is used instead
+    pa = None
+    pacsv = None
+
+
+def read_csv_columns(
+    path: Path, columns: Collection[str], dtypes: Optional[Dict[str, str]] = None
+) -> pd.DataFrame:
+    """Read the subset of ``columns`` present in a CSV file as NumPy-backed columns.
+
+    The file is memory-mapped and parsed by the multi-threaded pyarrow reader when it
+    is installed, falling back to ``pd.read_csv`` otherwise. Columns missing from the
+    file are skipped, like a callable ``usecols``; when none are present the result
+    is an empty frame on both paths.
+    """
+    dtypes = dtypes or {}
+    with open(path, newline="") as handle:
+        header = next(csv.reader(handle), [])
+    include_columns = [column for column in header if column in columns]
+    if not include_columns:
+        # pyarrow reads an empty include list as "every column"
+        return pd.DataFrame(columns=[])
+
+    if pacsv is None:
+        return pd.read_csv(path, usecols=include_columns, dtype=dtypes, memory_map=True)
+
+    convert_options = pacsv.ConvertOptions(
+        include_columns=include_columns,
+        column_types={
+            column: pa.from_numpy_dtype(np.dtype(dtype))
+            for column, dtype in dtypes.items()
+            if column in include_columns
+        },
+    )
+    with pa.memory_map(str(path)) as source:
+        table = pacsv.read_csv(source, convert_options=convert_options)
+    return table.to_pandas()
+
+
+@lru_cache(maxsize=8)
+def _read_indexed_csv(
+    path: str, mtime_ns: int, columns: FrozenSet[str], dtypes: Tuple[Tuple[str, str], ...]
+) -> pd.DataFrame:
+    frame = read_csv_columns(Path(path), columns, dict(dtypes))
+    if "WORKOUT_ID" in frame.columns:
+        frame = frame.set_index("WORKOUT_ID", drop=False).sort_index(kind="stable")
+    return frame
+
+
+def read_workout_csv(
+    path: Path,
+    workout_id: int,
+    columns: Collection[str],
+    dtypes: Optional[Dict[str, str]] = None,
+) -> pd.DataFrame:
+    """Rows of one workout from a CSV that may hold several workouts.
+
+    The parsed file is cached, keyed by path and modification time, with a sorted
+    ``WORKOUT_ID`` index, so converting many workouts from one export parses it
+    once and slices each workout by index lookup. Files without a ``WORKOUT_ID``
+    column are returned whole.
+    """
+    frame = _read_indexed_csv(
+        str(path),
+        os.stat(path).st_mtime_ns,
+        frozenset(columns),
+        tuple(sorted((dtypes or {}).items())),
+    )
+    if "WORKOUT_ID" not in frame.columns:
+        return frame.copy()
+    if workout_id not in frame.index:
+        return frame.iloc[:0].reset_index(drop=True)
+    return frame.loc[[workout_id]].reset_index(drop=True)
+
+
+def fix_heart_rates(frame: pd.DataFrame) -> pd.DataFrame:
+    """Undo the signed-byte wrap of ``HEART_RATE`` and drop rows without a reading."""
+    heart_rates = frame["HEART_RATE"].to_numpy()
+    heart_rates = np.where(heart_rates < 0, heart_rates + 256, heart_rates)
+    has_heart_rate = heart_rates > 0
+    return frame.loc[has_heart_rate].assign(HEART_RATE=heart_rates[has_heart_rate])
+
+
+def sort_by_timestamp(frame: pd.DataFrame) -> pd.DataFrame:
+    """Order rows by ``TIMESTAMP`` with a fresh index; already ordered exports skip the sort."""
+    if not frame["TIMESTAMP"].is_monotonic_increasing:
+        frame = frame.sort_values("TIMESTAMP", kind="stable")
+    return frame.reset_index(drop=True)
@@ -1,10 +1,14 @@
 import json
+import os
 import sqlite3
 import sys
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Tuple, Union, cast
+from typing import Callable, FrozenSet, Iterable, Iterator, Optional, Tuple, cast
 
 import pandas as pd
 
@@ -20,6 +24,19 @@ from delete_strava_workouts import run_delete_mode as run_strava_delete_mode
 
 CONFIG_FILE_NAME = "file_config.json"
 SYNC_DB_FILE_NAME = "workout_sync.db"
+# Upserts are committed in batches so the write lock is released regularly and an
+# interrupted run keeps the rows of the workouts it already converted
+SYNC_DB_COMMIT_EVERY = 50
+SUMMARY_NUMERIC_COLUMNS = [
+	"WORKOUT_NUMBER",
+	"START_TIMESTAMP",
+	"END_TIMESTAMP",
+	"DURATION",
+	"TOTAL_TIME",
+	"DISTANCE",
+	"CALORIES",
+	"POOL_LENGTH",
+]
 
 TYPE_TO_WORKOUT_TYPE = {
 	"3": "cycling",
@@ -29,6 +46,13 @@ TYPE_TO_WORKOUT_TYPE = {
 	"6": "swimming",
 }
 
+WORKOUT_ANALYZERS = {
+	"cycling": analyze_cycling,
+	"indoor_cycling": analyze_indoor_cycling,
+	"strength": analyze_strength,
+	"indoor_running": analyze_indoor_running,
+}
+
 
 def load_config() -> dict:
 	config_file = Path(CONFIG_FILE_NAME)
@@ -45,10 +69,30 @@ def load_config() -> dict:
 		return json.load(config_handle)
 
 
-def detect_workout_type(workout_dir: Path) -> Optional[str]:
+@dataclass(frozen=True)
+class WorkoutDirListing:
+	file_names: FrozenSet[str]
+	has_gpx: bool
+
+
+def scan_workout_dir(workout_dir: Path) -> WorkoutDirListing:
+	with os.scandir(workout_dir) as entries:
+		file_names = frozenset(entry.name for entry in entries if entry.is_file())
+	has_gpx = any(
+		name.startswith("workout_") and name.endswith(".gpx") for name in file_names
+	)
+	return WorkoutDirListing(file_names=file_names, has_gpx=has_gpx)
+
+
+def detect_workout_type(
+	workout_dir: Path, listing: Optional[WorkoutDirListing] = None
+) -> Optional[str]:
+	if listing is None:
+		listing = scan_workout_dir(workout_dir)
+
 	summary_path = workout_dir / "HUAWEI_WORKOUT_SUMMARY_SAMPLE.csv"
-	has_summary = summary_path.exists()
-	has_data = (workout_dir / "HUAWEI_WORKOUT_DATA_SAMPLE.csv").exists()
+	has_summary = summary_path.name in listing.file_names
+	has_data = "HUAWEI_WORKOUT_DATA_SAMPLE.csv" in listing.file_names
 
 	if has_summary:
 		try:
@@ -77,12 +121,10 @@ def detect_workout_type(workout_dir: Path) -> Optional[str]:
 			pass
 
 	# Fallback only when summary type is missing/unknown
-	swim_segments = workout_dir / "HUAWEI_WORKOUT_SWIM_SEGMENTS_SAMPLE.csv"
-	if swim_segments.exists():
+	if "HUAWEI_WORKOUT_SWIM_SEGMENTS_SAMPLE.csv" in listing.file_names:
 		return "swimming"
 
-	gpx_matches = list(workout_dir.glob("workout_*.gpx"))
-	if gpx_matches:
+	if listing.has_gpx:
 		return "cycling"
 
 	if has_summary and has_data:
@@ -130,6 +172,8 @@ def resolve_sync_db_path(sync_db_location: str) -> Path:
 
 
 def init_sync_db(connection: sqlite3.Connection) -> None:
+	connection.execute("PRAGMA journal_mode=WAL")
+	connection.execute("PRAGMA synchronous=NORMAL")
 	connection.execute(
 		"""
 		CREATE TABLE IF NOT EXISTS workouts (
@@ -153,24 +197,34 @@ def init_sync_db(connection: sqlite3.Connection) -> None:
 		)
 		"""
 	)
+	connection.execute(
+		"CREATE INDEX IF NOT EXISTS idx_workouts_strava_synced ON workouts(strava_synced)"
+	)
+	connection.execute(
+		"CREATE INDEX IF NOT EXISTS idx_workouts_date ON workouts(workout_date)"
+	)
 	connection.commit()
 
 
-def load_summary_row(workout_dir: Path, workout_id: int) -> dict:
+def load_summary_row(workout_dir: Path, workout_id: int) -> pd.DataFrame:
+	"""Return the workout summary as a one-row frame of numeric columns (NaN when missing)."""
+	missing_summary = pd.DataFrame(index=[0], columns=SUMMARY_NUMERIC_COLUMNS, dtype=float)
 	summary_path = workout_dir / "HUAWEI_WORKOUT_SUMMARY_SAMPLE.csv"
 	if not summary_path.exists():
-		return {}
+		return missing_summary
 
 	df_summary = pd.read_csv(summary_path)
-	if df_summary.empty:
-		return {}
-
 	if "WORKOUT_ID" in df_summary.columns:
 		df_summary = df_summary[df_summary["WORKOUT_ID"] == workout_id]
-		if df_summary.empty:
-			return {}
+	if df_summary.empty:
+		return missing_summary
 
-	return df_summary.iloc[0].to_dict()
+	return (
+		df_summary.iloc[:1]
+		.reindex(columns=SUMMARY_NUMERIC_COLUMNS)
+		.apply(pd.to_numeric, errors="coerce")
+		.reset_index(drop=True)
+	)
 
 
 def as_float(value) -> Optional[float]:
@@ -185,25 +239,17 @@ def as_int(value) -> Optional[int]:
 	return int(value)
 
 
-def derive_workout_date_iso(summary_row: dict) -> Optional[str]:
-	start_ts = as_float(summary_row.get("START_TIMESTAMP"))
+def derive_workout_date_iso(summary: pd.DataFrame) -> Optional[str]:
+	start_ts = as_float(summary["START_TIMESTAMP"].iloc[0])
 	if start_ts is None:
 		return None
 	return datetime.utcfromtimestamp(start_ts).isoformat() + "Z"
 
 
-def derive_duration_seconds(summary_row: dict) -> Optional[float]:
-	for key in ("DURATION", "TOTAL_TIME"):
-		value = as_float(summary_row.get(key))
-		if value is not None:
-			return value
-
-	start_ts = as_float(summary_row.get("START_TIMESTAMP"))
-	end_ts = as_float(summary_row.get("END_TIMESTAMP"))
-	if start_ts is not None and end_ts is not None:
-		return max(0.0, end_ts - start_ts)
-
-	return None
+def derive_duration_seconds(summary: pd.DataFrame) -> Optional[float]:
+	elapsed = (summary["END_TIMESTAMP"] - summary["START_TIMESTAMP"]).clip(lower=0.0)
+	duration = summary["DURATION"].fillna(summary["TOTAL_TIME"]).fillna(elapsed)
+	return as_float(duration.iloc[0])
 
 
 def upsert_workout_row(
@@ -212,15 +258,22 @@ def upsert_workout_row(
 	workout_dir: Path,
 	workout_type: str,
 	fit_path: Path,
+	listing: Optional[WorkoutDirListing] = None,
+	now_iso: Optional[str] = None,
 ) -> None:
+	if listing is None:
+		listing = scan_workout_dir(workout_dir)
+	if now_iso is None:
+		now_iso = datetime.utcnow().isoformat() + "Z"
+
 	summary = load_summary_row(workout_dir, workout_id)
-	workout_number = as_int(summary.get("WORKOUT_NUMBER"))
+	summary_row = summary.iloc[0]
+	workout_number = as_int(summary_row["WORKOUT_NUMBER"])
 	workout_date = derive_workout_date_iso(summary)
 	duration_seconds = derive_duration_seconds(summary)
-	total_distance_m = as_float(summary.get("DISTANCE"))
-	total_calories = as_int(summary.get("CALORIES"))
-	has_gps = 1 if any(workout_dir.glob("workout_*.gpx")) else 0
-	now_iso = datetime.utcnow().isoformat() + "Z"
+	total_distance_m = as_float(summary_row["DISTANCE"])
+	total_calories = as_int(summary_row["CALORIES"])
+	has_gps = 1 if listing.has_gpx else 0
 
 	connection.execute(
 		"""
@@ -268,7 +321,6 @@ def upsert_workout_row(
 			now_iso,
 		),
 	)
-	connection.commit()
 
 
 def get_sync_status(
@@ -283,21 +335,76 @@ def get_sync_status(
 	return bool(row[0]), row[1]
 
 
-def should_skip_workout(connection: sqlite3.Connection, workout_id: int) -> bool:
+def get_workout_state(
+	connection: sqlite3.Connection, workout_id: int
+) -> Tuple[Optional[str], bool, Optional[str]]:
+	"""Return (fit_file_path, strava_synced, strava_activity_url) in one lookup."""
 	row = connection.execute(
-		"SELECT fit_file_path FROM workouts WHERE workout_id = ?",
+		"SELECT fit_file_path, strava_synced, strava_activity_url "
+		"FROM workouts WHERE workout_id = ?",
 		(workout_id,),
 	).fetchone()
 	if not row:
-		return False
+		return None, False, None
+	return row[0], bool(row[1]), row[2]
+
 
-	fit_file_path = row[0]
+def should_skip_workout(fit_file_path: Optional[str]) -> bool:
 	if not fit_file_path:
 		return False
 
 	return Path(fit_file_path).exists()
 
 
+@dataclass(frozen=True)
+class PendingWorkout:
+	workout_dir: Path
+	workout_id: int
+	workout_type: str
+	listing: WorkoutDirListing
+
+
+def analyze_workout_dir(pending: PendingWorkout, fit_root: Path) -> Path:
+	workout_dir = pending.workout_dir
+	if pending.workout_type == "swimming":
+		print(f"Analyzing swimming workout in {workout_dir}...")
+		summary = load_summary_row(workout_dir, pending.workout_id)
+		pool_length_cm = as_int(summary["POOL_LENGTH"].iloc[0])
+		pool_length = 25
+		if pool_length_cm and pool_length_cm > 0:
+			pool_length = pool_length_cm // 100
+
+		print(f"  Pool length: {pool_length}m")
+		return analyze_swimming(workout_dir, fit_root, pool_length=pool_length)
+
+	label = pending.workout_type.replace("_", " ")
+	print(f"Analyzing {label} workout in {workout_dir}...")
+	return WORKOUT_ANALYZERS[pending.workout_type](workout_dir, fit_root)
+
+
+def iter_analyzed_workouts(
+	pending_workouts: Iterable[PendingWorkout], fit_root: Path, jobs: int
+) -> Iterator[Tuple[PendingWorkout, Callable[[], Path]]]:
+	"""Yield each workout with a callable returning its FIT path or raising its error.
+
+	With one job the workouts are analyzed lazily in order. With more, all of them
+	are submitted to a process pool up front and yielded in submission order.
+	"""
+	if jobs <= 1:
+		for pending in pending_workouts:
+			yield pending, partial(analyze_workout_dir, pending, fit_root)
+		return
+
+	pending_workouts = list(pending_workouts)
+	with ProcessPoolExecutor(max_workers=jobs) as executor:
+		futures = [
+			executor.submit(analyze_workout_dir, pending, fit_root)
+			for pending in pending_workouts
+		]
+		for pending, future in zip(pending_workouts, futures):
+			yield pending, future.result
+
+
 def main() -> None:
 	parser = argparse.ArgumentParser(
 		description="Analyze Huawei workouts and generate FIT files with sync metadata."
@@ -312,7 +419,14 @@ def main() -> None:
 		action="store_true",
 		help="Check Strava for deleted activities and update the local database.",
 	)
+	parser.add_argument(
+		"--jobs",
+		type=int,
+		default=1,
+		help="Worker processes for FIT conversion (default 1; 0 uses every CPU core).",
+	)
 	args = parser.parse_args()
+	jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
 
 	if args.delete_mode:
 		run_strava_delete_mode()
@@ -339,105 +453,85 @@ def main() -> None:
 	init_sync_db(connection)
 	print(f"Sync database: {sync_db_path}")
 
-	workout_dirs = [path for path in workout_root.iterdir() if path.is_dir()]
-
-	def workout_sort_key(path: Path) -> Tuple[int, Union[int, str]]:
-		name = path.name.strip()
-		if name.isdigit():
-			return (0, int(name))
-		return (1, name)
-
-	workout_dirs.sort(key=workout_sort_key)
-	workout_dirs.reverse()
+	workout_dirs = []
+	non_numeric_dirs = []
+	with os.scandir(workout_root) as entries:
+		for entry in entries:
+			if not entry.is_dir():
+				continue
+			if entry.name.isdigit():
+				workout_dirs.append(Path(entry.path))
+			else:
+				non_numeric_dirs.append(Path(entry.path))
+	workout_dirs.sort(key=lambda path: int(path.name), reverse=True)
 
-	if not workout_dirs:
+	if not workout_dirs and not non_numeric_dirs:
 		print("No workout folders found.")
 		connection.close()
 		return
 
-	for workout_dir in workout_dirs:
+	for workout_dir in sorted(non_numeric_dirs, reverse=True):
 		print("\n")
-		workout_type = detect_workout_type(workout_dir)
-		if not workout_dir.name.isdigit():
-			print(f"Skipping {workout_dir}: folder name is not numeric workout ID.")
-			continue
-		workout_id = int(workout_dir.name)
-		if not args.force and should_skip_workout(connection, workout_id):
-			print(
-				f"Skipping {workout_dir}: already in DB and FIT file exists. "
-				"Use --force to reprocess."
-			)
-			synced, url = get_sync_status(connection, workout_id)
-			print(f"  Sync status: {'synced' if synced else 'not synced'}")
-			if url:
-				print(f"  Strava URL: {url}")
-			continue
-		fit_path: Optional[Path] = None
-
-		try:
-			if workout_type == "swimming":
-				print(f"Analyzing swimming workout in {workout_dir}...")
-				summary = load_summary_row(workout_dir, workout_id)
-				pool_length_cm = as_int(summary.get("POOL_LENGTH", 2500))
-				pool_length = 25
-				if pool_length_cm and pool_length_cm > 0:
-					pool_length = pool_length_cm // 100
-				
-				print(f"  Pool length: {pool_length}m")
-				fit_path = analyze_swimming(workout_dir, fit_root, pool_length=pool_length)
-				upsert_workout_row(connection, workout_id, workout_dir, workout_type, fit_path)
-				synced, url = get_sync_status(connection, workout_id)
-				print(f"  Sync status: {'synced' if synced else 'not synced'}")
-				if url:
-					print(f"  Strava URL: {url}")
-				continue
-
-			if workout_type == "cycling":
-				print(f"Analyzing cycling workout in {workout_dir}...")
-				fit_path = analyze_cycling(workout_dir, fit_root)
-				upsert_workout_row(connection, workout_id, workout_dir, workout_type, fit_path)
-				synced, url = get_sync_status(connection, workout_id)
-				print(f"  Sync status: {'synced' if synced else 'not synced'}")
-				if url:
-					print(f"  Strava URL: {url}")
+		print(f"Skipping {workout_dir}: folder name is not numeric workout ID.")
+
+	analyzed_at = datetime.utcnow().isoformat() + "Z"
+
+	def iter_pending_workouts() -> Iterator[PendingWorkout]:
+		for workout_dir in workout_dirs:
+			print("\n")
+			listing = scan_workout_dir(workout_dir)
+			workout_type = detect_workout_type(workout_dir, listing)
+			workout_id = int(workout_dir.name)
+			if not args.force:
+				tracked_fit_path, synced, url = get_workout_state(connection, workout_id)
+				if should_skip_workout(tracked_fit_path):
+					print(
+						f"Skipping {workout_dir}: already in DB and FIT file exists. "
+						"Use --force to reprocess."
+					)
+					print(f"  Sync status: {'synced' if synced else 'not synced'}")
+					if url:
+						print(f"  Strava URL: {url}")
+					continue
+
+			if workout_type != "swimming" and workout_type not in WORKOUT_ANALYZERS:
+				print(f"Skipping {workout_dir}: no recognizable workout files.")
 				continue
 
-			if workout_type == "indoor_cycling":
-				print(f"Analyzing indoor cycling workout in {workout_dir}...")
-				fit_path = analyze_indoor_cycling(workout_dir, fit_root)
-				upsert_workout_row(connection, workout_id, workout_dir, workout_type, fit_path)
-				synced, url = get_sync_status(connection, workout_id)
-				print(f"  Sync status: {'synced' if synced else 'not synced'}")
-				if url:
-					print(f"  Strava URL: {url}")
-				continue
-
-			if workout_type == "strength":
-				print(f"Analyzing strength workout in {workout_dir}...")
-				fit_path = analyze_strength(workout_dir, fit_root)
-				upsert_workout_row(connection, workout_id, workout_dir, workout_type, fit_path)
-				synced, url = get_sync_status(connection, workout_id)
-				print(f"  Sync status: {'synced' if synced else 'not synced'}")
-				if url:
-					print(f"  Strava URL: {url}")
-				continue
-
-			if workout_type == "indoor_running":
-				print(f"Analyzing indoor running workout in {workout_dir}...")
-				fit_path = analyze_indoor_running(workout_dir, fit_root)
-				upsert_workout_row(connection, workout_id, workout_dir, workout_type, fit_path)
+			yield PendingWorkout(workout_dir, workout_id, workout_type, listing)
+
+	upserted = 0
+	try:
+		for pending, analyzed_fit_path in iter_analyzed_workouts(
+			iter_pending_workouts(), fit_root, jobs
+		):
+			workout_id = pending.workout_id
+			try:
+				fit_path = analyzed_fit_path()
+				upsert_workout_row(
+					connection,
+					workout_id,
+					pending.workout_dir,
+					pending.workout_type,
+					fit_path,
+					pending.listing,
+					now_iso=analyzed_at,
+				)
+				upserted += 1
+				if upserted % SYNC_DB_COMMIT_EVERY == 0:
+					connection.commit()
 				synced, url = get_sync_status(connection, workout_id)
 				print(f"  Sync status: {'synced' if synced else 'not synced'}")
 				if url:
 					print(f"  Strava URL: {url}")
-				continue
-		except Exception as e:
-			print(f"Error analyzing workout {workout_id}: {e}")
-			print("Skipping this workout.")
-			continue
-
-		print(f"Skipping {workout_dir}: no recognizable workout files.")
-
+			except Exception as e:
+				print(f"Error analyzing workout {workout_id}: {e}")
+				print("Skipping this workout.")
+	finally:
+		# Whatever is left since the last batch, including workouts done before an error
+		connection.commit()
+
+	connection.execute("PRAGMA optimize")
 	connection.close()
 
 
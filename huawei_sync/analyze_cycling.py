@@ -1,10 +1,9 @@
 import argparse
-import math
-from datetime import datetime
 from pathlib import Path
 from typing import cast
 import xml.etree.ElementTree as ET
 
+import numpy as np
 import pandas as pd
 from fit_tool.fit_file_builder import FitFileBuilder
 from fit_tool.profile.messages.activity_message import ActivityMessage
@@ -14,64 +13,97 @@ from fit_tool.profile.messages.record_message import RecordMessage
 from fit_tool.profile.messages.session_message import SessionMessage
 from fit_tool.profile.profile_type import Activity, Event, EventType, Sport, SubSport
 
+from _fit import add_with_layout
+from _geo import track_distance_speed
+from _tables import fix_heart_rates, read_workout_csv, sort_by_timestamp
+
 
 MAX_REASONABLE_SPEED_MS = 30.0
 MAX_FIT_SPEED_MS = 65.535
 
+DATA_COLUMNS = {"WORKOUT_ID", "TIMESTAMP", "HEART_RATE", "SPEED"}
+# HEART_RATE is float so blank exported readings parse as NaN for fix_heart_rates to drop
+DATA_DTYPES = {"TIMESTAMP": "float64", "HEART_RATE": "float64", "SPEED": "float32"}
+SUMMARY_COLUMNS = {"WORKOUT_ID", "START_TIMESTAMP", "END_TIMESTAMP", "DISTANCE", "CALORIES"}
 
-def parse_iso_timestamp(value: str) -> float:
-    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
-
-def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    radius = 6371000
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    delta_phi = math.radians(lat2 - lat1)
-    delta_lambda = math.radians(lon2 - lon1)
 
-    a = (
-        math.sin(delta_phi / 2) ** 2
-        + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2
+def parse_iso_timestamps(values: list[str]) -> np.ndarray:
+    parsed = pd.to_datetime(values, utc=True, format="ISO8601")
+    return ((parsed - pd.Timestamp(0, tz="UTC")) / pd.Timedelta(seconds=1)).to_numpy(
+        dtype=np.float64
     )
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return radius * c
+
+def _local_tag(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
 
 
 def parse_gpx_points(path: Path) -> pd.DataFrame:
-    tree = ET.parse(path)
-    root = tree.getroot()
-    if "}" in root.tag:
-        ns = {"gpx": root.tag.split("}")[0].strip("{")}
-        trkpt_path = ".//gpx:trkpt"
-        time_path = "gpx:time"
-        ele_path = "gpx:ele"
-    else:
-        ns = {}
-        trkpt_path = ".//trkpt"
-        time_path = "time"
-        ele_path = "ele"
-
-    records = []
-    for point in root.findall(trkpt_path, ns):
-        lat_raw = point.attrib.get("lat")
-        lon_raw = point.attrib.get("lon")
+    time_texts = []
+    lats = []
+    lons = []
+    eles = []
+    for _, element in ET.iterparse(path, events=("end",)):
+        if _local_tag(element.tag) != "trkpt":
+            continue
+
+        lat_raw = element.attrib.get("lat")
+        lon_raw = element.attrib.get("lon")
+        time_text = None
+        ele_text = None
+        for child in element:
+            child_tag = _local_tag(child.tag)
+            if child_tag == "time" and time_text is None:
+                time_text = child.text or ""
+            elif child_tag == "ele" and ele_text is None:
+                ele_text = child.text or ""
+        element.clear()
+
         if lat_raw is None or lon_raw is None:
             continue
-        lat = float(lat_raw)
-        lon = float(lon_raw)
-        time_node = point.find(time_path, ns)
-        if time_node is None or not time_node.text:
+        if not time_text:
             continue
 
-        ele_node = point.find(ele_path, ns)
-        ele = float(ele_node.text) if ele_node is not None and ele_node.text else None
-        timestamp = parse_iso_timestamp(time_node.text.strip())
-        records.append({"timestamp": timestamp, "lat": lat, "lon": lon, "ele": ele})
+        time_texts.append(time_text.strip())
+        lats.append(float(lat_raw))
+        lons.append(float(lon_raw))
+        eles.append(float(ele_text) if ele_text else np.nan)
 
-    if not records:
+    if not time_texts:
         raise ValueError("No track points found in GPX file")
 
-    return pd.DataFrame(records).sort_values("timestamp").reset_index(drop=True)
+    timestamps = parse_iso_timestamps(time_texts)
+    order = np.argsort(timestamps, kind="stable")
+    return pd.DataFrame(
+        {
+            "timestamp": timestamps[order],
+            "lat": np.asarray(lats, dtype=np.float64)[order],
+            "lon": np.asarray(lons, dtype=np.float64)[order],
+            "ele": np.asarray(eles, dtype=np.float64)[order],
+        }
+    )
+
+
+def nearest_heart_rates(
+    track_timestamps: np.ndarray,
+    hr_timestamps: np.ndarray,
+    heart_rates: np.ndarray,
+    tolerance: float,
+) -> np.ndarray:
+    """Nearest sensor heart rate per track point, NaN when none is within tolerance.
+
+    Both timestamp arrays must be sorted; ties resolve to the earlier sample.
+    """
+    last_idx = len(hr_timestamps) - 1
+    next_idx = np.searchsorted(hr_timestamps, track_timestamps, side="right")
+    prev_idx = np.clip(next_idx - 1, 0, last_idx)
+    next_idx = np.clip(next_idx, 0, last_idx)
+
+    prev_gap = np.abs(track_timestamps - hr_timestamps[prev_idx])
+    next_gap = np.abs(hr_timestamps[next_idx] - track_timestamps)
+    chosen_idx = np.where(prev_gap <= next_gap, prev_idx, next_idx)
+    chosen_gap = np.minimum(prev_gap, next_gap)
+
+    return np.where(chosen_gap <= tolerance, heart_rates[chosen_idx], np.nan)
 
 
 def analyze_workout(workout_dir: Path, output_dir: Path) -> Path:
@@ -84,7 +116,6 @@ def analyze_workout(workout_dir: Path, output_dir: Path) -> Path:
 
     data_fname = workout_dir / "HUAWEI_WORKOUT_DATA_SAMPLE.csv"
     summary_fname = workout_dir / "HUAWEI_WORKOUT_SUMMARY_SAMPLE.csv"
-    additional_fname = workout_dir / "HUAWEI_WORKOUT_SUMMARY_ADDITIONAL_VALUES_SAMPLE.csv"
 
     if not data_fname.exists() or not summary_fname.exists():
         raise FileNotFoundError(
@@ -97,15 +128,8 @@ def analyze_workout(workout_dir: Path, output_dir: Path) -> Path:
     gpx_fname = gpx_matches[0] if has_gpx else None
 
     print("Reading data files...")
-    df_data = pd.read_csv(data_fname)
-    df_summary = pd.read_csv(summary_fname)
-    if additional_fname.exists():
-        pd.read_csv(additional_fname)
-
-    if "WORKOUT_ID" in df_summary.columns:
-        df_summary = df_summary[df_summary["WORKOUT_ID"] == int(workout_id)]
-    if "WORKOUT_ID" in df_data.columns:
-        df_data = df_data[df_data["WORKOUT_ID"] == int(workout_id)]
+    df_data = read_workout_csv(data_fname, int(workout_id), DATA_COLUMNS, DATA_DTYPES)
+    df_summary = read_workout_csv(summary_fname, int(workout_id), SUMMARY_COLUMNS)
 
     if df_summary.empty:
         raise ValueError("Summary file does not contain the workout ID.")
@@ -114,16 +138,9 @@ def analyze_workout(workout_dir: Path, output_dir: Path) -> Path:
 
     print("Processing cycling data...")
 
-    selected_columns = ["TIMESTAMP", "HEART_RATE"]
-    if "SPEED" in df_data.columns:
-        selected_columns.append("SPEED")
-
-    df_data = df_data[selected_columns].copy()
-    df_data.loc[df_data["HEART_RATE"] < 0, "HEART_RATE"] += 256
-    df_data = df_data[df_data["HEART_RATE"] > 0]
-    df_data["TIMESTAMP"] = df_data["TIMESTAMP"].astype(float)
+    df_data = fix_heart_rates(df_data)
     df_data = df_data[df_data["TIMESTAMP"] > 631065600]
-    df_data = df_data.sort_values("TIMESTAMP").reset_index(drop=True)
+    df_data = sort_by_timestamp(df_data)
 
     if "SPEED" in df_data.columns:
         df_data["SPEED_MS"] = df_data["SPEED"].astype(float) / 10.0
@@ -143,39 +160,20 @@ def analyze_workout(workout_dir: Path, output_dir: Path) -> Path:
             print("Warning: GPX found but contains no valid track points after 1989. Falling back to sensor-only reconstruction.")
             has_gpx = False
         else:
-            distances = [0.0]
-            speeds = [0.0]
-
-            for idx in range(1, len(df_gpx)):
-                prev = df_gpx.iloc[idx - 1]
-                cur = df_gpx.iloc[idx]
-                delta = haversine_m(prev["lat"], prev["lon"], cur["lat"], cur["lon"])
-                dt = cur["timestamp"] - prev["timestamp"]
-
-                if dt <= 0:
-                    speeds.append(0.0)
-                    distances.append(distances[-1])
-                    continue
-
-                raw_speed = delta / dt
-                if raw_speed > MAX_REASONABLE_SPEED_MS:
-                    speeds.append(0.0)
-                    distances.append(distances[-1])
-                    continue
-
-                speeds.append(raw_speed)
-                distances.append(distances[-1] + delta)
-
+            distances, speeds = track_distance_speed(
+                df_gpx["lat"].to_numpy(),
+                df_gpx["lon"].to_numpy(),
+                df_gpx["timestamp"].to_numpy(),
+                MAX_REASONABLE_SPEED_MS,
+            )
             df_gpx["distance"] = distances
             df_gpx["speed"] = speeds
 
             if not df_data.empty:
-                df_gpx = pd.merge_asof(
-                    df_gpx,
-                    df_data,
-                    left_on="timestamp",
-                    right_on="TIMESTAMP",
-                    direction="nearest",
+                df_gpx["HEART_RATE"] = nearest_heart_rates(
+                    df_gpx["timestamp"].to_numpy(dtype=float),
+                    df_data["TIMESTAMP"].to_numpy(dtype=float),
+                    df_data["HEART_RATE"].to_numpy(),
                     tolerance=5,
                 )
 
@@ -187,13 +185,11 @@ def analyze_workout(workout_dir: Path, output_dir: Path) -> Path:
         if df_data.empty:
             raise ValueError("No sensor records found for cycling workout without GPX.")
 
-        reconstructed_distance = [0.0]
-        for idx in range(1, len(df_data)):
-            prev_ts = float(df_data.iloc[idx - 1]["TIMESTAMP"])
-            cur_ts = float(df_data.iloc[idx]["TIMESTAMP"])
-            dt = max(0.0, cur_ts - prev_ts)
-            speed_ms = float(df_data.iloc[idx - 1]["SPEED_MS"])
-            reconstructed_distance.append(reconstructed_distance[-1] + speed_ms * dt)
+        sample_dts = np.maximum(np.diff(df_data["TIMESTAMP"].to_numpy(dtype=float)), 0.0)
+        sample_speeds = df_data["SPEED_MS"].to_numpy(dtype=float)
+        reconstructed_distance = np.concatenate(
+            ([0.0], np.cumsum(sample_speeds[:-1] * sample_dts))
+        )
 
         df_track = pd.DataFrame(
             {
@@ -225,8 +221,9 @@ def analyze_workout(workout_dir: Path, output_dir: Path) -> Path:
 
     avg_speed = total_distance / total_time if total_time > 0 else 0
 
-    avg_heart_rate = int(df_data["HEART_RATE"].mean()) if not df_data.empty else 0
-    max_heart_rate = int(df_data["HEART_RATE"].max()) if not df_data.empty else 0
+    heart_rates = df_data["HEART_RATE"].to_numpy()
+    avg_heart_rate = int(heart_rates.mean()) if heart_rates.size else 0
+    max_heart_rate = int(heart_rates.max()) if heart_rates.size else 0
     calories = int(df_summary.get("CALORIES", 0))
 
     print(f"Total time: {total_time:.1f}s ({total_time/60:.1f}min)")
@@ -279,23 +276,70 @@ def analyze_workout(workout_dir: Path, output_dir: Path) -> Path:
     builder.add(session)
 
     print(f"Adding {len(df_track)} track points...")
-    for _, row in df_track.iterrows():
-        record = RecordMessage()
-        record.timestamp = int(row["timestamp"] * 1000)
-        if has_gpx and "lat" in row and "lon" in row:
-            record.position_lat = float(row["lat"])
-            record.position_long = float(row["lon"])
-        record.distance = float(row["distance"])
-        safe_speed = max(0.0, min(float(row["speed"]), MAX_FIT_SPEED_MS))
-        record.speed = safe_speed
-
-        if row.get("ele") is not None and not pd.isna(row.get("ele")):
-            record.altitude = float(row["ele"])
-
-        if "HEART_RATE" in row and not pd.isna(row["HEART_RATE"]):
-            record.heart_rate = int(row["HEART_RATE"])
-
-        builder.add(record)
+    record_columns = ["timestamp", "lat", "lon", "distance", "speed", "ele", "HEART_RATE"]
+    record_data = df_track.reindex(columns=record_columns)
+    lats = record_data["lat"].to_numpy(dtype=float)
+    lons = record_data["lon"].to_numpy(dtype=float)
+    altitudes = record_data["ele"].to_numpy(dtype=float)
+    heart_rates = record_data["HEART_RATE"].to_numpy(dtype=float)
+
+    timestamps_ms = (record_data["timestamp"].to_numpy(dtype=float) * 1000).astype(np.int64)
+    has_positions = has_gpx & ~np.isnan(lats) & ~np.isnan(lons)
+    distances = record_data["distance"].to_numpy(dtype=float)
+    safe_speeds = np.clip(
+        np.nan_to_num(record_data["speed"].to_numpy(dtype=float), nan=0.0),
+        0.0,
+        MAX_FIT_SPEED_MS,
+    )
+    has_altitudes = ~np.isnan(altitudes)
+    has_heart_rates = ~np.isnan(heart_rates)
+    heart_rates = np.where(has_heart_rates, heart_rates, 0).astype(np.int64)
+
+    new_record = RecordMessage
+    record_definitions = {}
+    for (
+        timestamp_ms,
+        has_position,
+        lat,
+        lon,
+        distance,
+        speed,
+        has_altitude,
+        altitude,
+        has_heart_rate,
+        heart_rate,
+    ) in zip(
+        timestamps_ms.tolist(),
+        has_positions.tolist(),
+        lats.tolist(),
+        lons.tolist(),
+        distances.tolist(),
+        safe_speeds.tolist(),
+        has_altitudes.tolist(),
+        altitudes.tolist(),
+        has_heart_rates.tolist(),
+        heart_rates.tolist(),
+    ):
+        record = new_record()
+        record.timestamp = timestamp_ms
+        if has_position:
+            record.position_lat = lat
+            record.position_long = lon
+        record.distance = distance
+        record.speed = speed
+
+        if has_altitude:
+            record.altitude = altitude
+
+        if has_heart_rate:
+            record.heart_rate = heart_rate
+
+        add_with_layout(
+            builder,
+            record,
+            (has_position, has_altitude, has_heart_rate),
+            record_definitions,
+        )
 
     activity = ActivityMessage()
     activity.timestamp = end_timestamp * 1000
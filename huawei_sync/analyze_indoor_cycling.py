@@ -2,6 +2,7 @@ import argparse
 from pathlib import Path
 from typing import cast
 
+import numpy as np
 import pandas as pd
 from fit_tool.fit_file_builder import FitFileBuilder
 from fit_tool.profile.messages.activity_message import ActivityMessage
@@ -10,9 +11,18 @@ from fit_tool.profile.messages.record_message import RecordMessage
 from fit_tool.profile.messages.session_message import SessionMessage
 from fit_tool.profile.profile_type import Activity, Event, EventType, Sport, SubSport
 
+from _fit import add_all_with_layout
+from _tables import fix_heart_rates, read_workout_csv, sort_by_timestamp
+
 
 MAX_FIT_SPEED_MS = 65.535
 
+DATA_COLUMNS = {"WORKOUT_ID", "TIMESTAMP", "HEART_RATE", "SPEED"}
+DATA_DTYPES = {"TIMESTAMP": "float64", "HEART_RATE": "float64", "SPEED": "float32"}
+SUMMARY_COLUMNS = {"WORKOUT_ID", "START_TIMESTAMP", "END_TIMESTAMP", "DISTANCE", "CALORIES"}
+
+RECORD_LAYOUT = ("timestamp", "heart_rate", "speed", "distance")
+
 
 def analyze_workout(workout_dir: Path, output_dir: Path) -> Path:
     workout_dir = Path(workout_dir)
@@ -32,13 +42,8 @@ def analyze_workout(workout_dir: Path, output_dir: Path) -> Path:
         )
 
     print("Reading indoor cycling data files...")
-    df_data = pd.read_csv(data_fname)
-    df_summary = pd.read_csv(summary_fname)
-
-    if "WORKOUT_ID" in df_data.columns:
-        df_data = df_data[df_data["WORKOUT_ID"] == int(workout_id)]
-    if "WORKOUT_ID" in df_summary.columns:
-        df_summary = df_summary[df_summary["WORKOUT_ID"] == int(workout_id)]
+    df_data = read_workout_csv(data_fname, int(workout_id), DATA_COLUMNS, DATA_DTYPES)
+    df_summary = read_workout_csv(summary_fname, int(workout_id), SUMMARY_COLUMNS)
 
     if df_summary.empty:
         raise ValueError("Summary file does not contain the workout ID.")
@@ -53,9 +58,8 @@ def analyze_workout(workout_dir: Path, output_dir: Path) -> Path:
     df_data = df_data[required_columns].copy()
     df_data["TIMESTAMP"] = df_data["TIMESTAMP"].astype(float)
     df_data = df_data[df_data["TIMESTAMP"] > 631065600]
-    df_data = df_data.sort_values("TIMESTAMP").reset_index(drop=True)
-    df_data.loc[df_data["HEART_RATE"] < 0, "HEART_RATE"] += 256
-    df_data = df_data[df_data["HEART_RATE"] > 0]
+    df_data = sort_by_timestamp(df_data)
+    df_data = fix_heart_rates(df_data)
     df_data["SPEED_MS"] = df_data["SPEED"].astype(float) / 10.0
     df_data.loc[df_data["SPEED_MS"] < 0, "SPEED_MS"] = 0.0
 
@@ -76,15 +80,9 @@ def analyze_workout(workout_dir: Path, output_dir: Path) -> Path:
     summary_distance = float(summary.get("DISTANCE", 0.0) or 0.0)
     total_calories = int(summary.get("CALORIES", 0) or 0)
 
-    cumulative_distance = [0.0]
-    for idx in range(1, len(df_data)):
-        prev_ts = float(df_data.iloc[idx - 1]["TIMESTAMP"])
-        cur_ts = float(df_data.iloc[idx]["TIMESTAMP"])
-        dt = max(0.0, cur_ts - prev_ts)
-        speed_ms = float(df_data.iloc[idx - 1]["SPEED_MS"])
-        cumulative_distance.append(cumulative_distance[-1] + speed_ms * dt)
-
-    df_data["DISTANCE_M"] = cumulative_distance
+    sample_dts = np.maximum(np.diff(df_data["TIMESTAMP"].to_numpy(dtype=float)), 0.0)
+    sample_speeds = df_data["SPEED_MS"].to_numpy(dtype=float)
+    df_data["DISTANCE_M"] = np.concatenate(([0.0], np.cumsum(sample_speeds[:-1] * sample_dts)))
     derived_distance = float(df_data["DISTANCE_M"].iloc[-1]) if not df_data.empty else 0.0
     total_distance = summary_distance if summary_distance > 0 else derived_distance
 
@@ -92,10 +90,11 @@ def analyze_workout(workout_dir: Path, output_dir: Path) -> Path:
         scale = total_distance / derived_distance
         df_data["DISTANCE_M"] = df_data["DISTANCE_M"] * scale
 
-    avg_heart_rate = int(df_data["HEART_RATE"].mean())
-    max_heart_rate = int(df_data["HEART_RATE"].max())
+    heart_rates = df_data["HEART_RATE"].to_numpy()
+    avg_heart_rate = int(heart_rates.mean()) if heart_rates.size else 0
+    max_heart_rate = int(heart_rates.max()) if heart_rates.size else 0
     avg_speed = total_distance / total_time if total_time > 0 else 0.0
-    max_speed = float(df_data["SPEED_MS"].max()) if not df_data.empty else 0.0
+    max_speed = float(np.nanmax(sample_speeds)) if sample_speeds.size else 0.0
 
     print(f"Total time: {total_time:.1f}s ({total_time/60:.1f}min)")
     print(f"Total distance: {total_distance:.1f}m")
@@ -140,14 +139,29 @@ def analyze_workout(workout_dir: Path, output_dir: Path) -> Path:
     session.event_type = EventType.STOP
     builder.add(session)
 
-    for _, row in df_data.iterrows():
+    record_timestamps = (df_data["TIMESTAMP"].to_numpy(dtype=float) * 1000).astype(np.int64)
+    record_heart_rates = df_data["HEART_RATE"].to_numpy().astype(np.int64)
+    record_speeds = np.clip(
+        np.nan_to_num(df_data["SPEED_MS"].to_numpy(dtype=float), nan=0.0),
+        0.0,
+        MAX_FIT_SPEED_MS,
+    )
+    record_distances = df_data["DISTANCE_M"].to_numpy(dtype=float)
+
+    records = []
+    for timestamp_ms, heart_rate, speed, distance in zip(
+        record_timestamps.tolist(),
+        record_heart_rates.tolist(),
+        record_speeds.tolist(),
+        record_distances.tolist(),
+    ):
         record = RecordMessage()
-        record.timestamp = int(float(row["TIMESTAMP"]) * 1000)
-        record.heart_rate = int(row["HEART_RATE"])
-        safe_speed = max(0.0, min(float(row["SPEED_MS"]), MAX_FIT_SPEED_MS))
-        record.speed = safe_speed
-        record.distance = float(row["DISTANCE_M"])
-        builder.add(record)
+        record.timestamp = timestamp_ms
+        record.heart_rate = heart_rate
+        record.speed = speed
+        record.distance = distance
+        records.append(record)
+    add_all_with_layout(builder, records, RECORD_LAYOUT)
 
     activity = ActivityMessage()
     activity.timestamp = end_timestamp * 1000
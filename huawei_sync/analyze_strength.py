@@ -2,6 +2,7 @@ import argparse
 from pathlib import Path
 from typing import cast
 
+import numpy as np
 import pandas as pd
 from fit_tool.fit_file_builder import FitFileBuilder
 from fit_tool.profile.messages.activity_message import ActivityMessage
@@ -10,6 +11,16 @@ from fit_tool.profile.messages.record_message import RecordMessage
 from fit_tool.profile.messages.session_message import SessionMessage
 from fit_tool.profile.profile_type import Activity, Event, EventType, Sport, SubSport
 
+from _fit import add_all_with_layout
+from _tables import fix_heart_rates, read_workout_csv, sort_by_timestamp
+
+
+DATA_COLUMNS = {"WORKOUT_ID", "TIMESTAMP", "HEART_RATE"}
+DATA_DTYPES = {"TIMESTAMP": "float64", "HEART_RATE": "float64"}
+SUMMARY_COLUMNS = {"WORKOUT_ID", "START_TIMESTAMP", "END_TIMESTAMP", "DISTANCE", "CALORIES"}
+
+RECORD_LAYOUT = ("timestamp", "heart_rate")
+
 
 def analyze_workout(workout_dir: Path, output_dir: Path) -> Path:
     workout_dir = Path(workout_dir)
@@ -29,13 +40,8 @@ def analyze_workout(workout_dir: Path, output_dir: Path) -> Path:
         )
 
     print("Reading strength data files...")
-    df_data = pd.read_csv(data_fname)
-    df_summary = pd.read_csv(summary_fname)
-
-    if "WORKOUT_ID" in df_data.columns:
-        df_data = df_data[df_data["WORKOUT_ID"] == int(workout_id)]
-    if "WORKOUT_ID" in df_summary.columns:
-        df_summary = df_summary[df_summary["WORKOUT_ID"] == int(workout_id)]
+    df_data = read_workout_csv(data_fname, int(workout_id), DATA_COLUMNS, DATA_DTYPES)
+    df_summary = read_workout_csv(summary_fname, int(workout_id), SUMMARY_COLUMNS)
 
     if df_summary.empty:
         raise ValueError("Summary file does not contain the workout ID.")
@@ -45,9 +51,8 @@ def analyze_workout(workout_dir: Path, output_dir: Path) -> Path:
     df_data = df_data[["TIMESTAMP", "HEART_RATE"]].copy()
     df_data["TIMESTAMP"] = df_data["TIMESTAMP"].astype(float)
     df_data = df_data[df_data["TIMESTAMP"] > 631065600]
-    df_data.loc[df_data["HEART_RATE"] < 0, "HEART_RATE"] += 256
-    df_data = df_data[df_data["HEART_RATE"] > 0]
-    df_data = df_data.sort_values("TIMESTAMP").reset_index(drop=True)
+    df_data = fix_heart_rates(df_data)
+    df_data = sort_by_timestamp(df_data)
 
     MIN_FIT_TIMESTAMP = 631065600
 
@@ -70,8 +75,9 @@ def analyze_workout(workout_dir: Path, output_dir: Path) -> Path:
     total_time = max(1, end_timestamp - start_timestamp)
     total_calories = int(summary.get("CALORIES", 0))
     total_distance = float(summary.get("DISTANCE", 0.0) or 0.0)
-    avg_heart_rate = int(df_data["HEART_RATE"].mean()) if not df_data.empty else 0
-    max_heart_rate = int(df_data["HEART_RATE"].max()) if not df_data.empty else 0
+    heart_rates = df_data["HEART_RATE"].to_numpy()
+    avg_heart_rate = int(heart_rates.mean()) if heart_rates.size else 0
+    max_heart_rate = int(heart_rates.max()) if heart_rates.size else 0
 
     print(f"Total time: {total_time:.1f}s ({total_time/60:.1f}min)")
     print(f"Total distance: {total_distance:.1f}m")
@@ -115,11 +121,16 @@ def analyze_workout(workout_dir: Path, output_dir: Path) -> Path:
     session.event_type = EventType.STOP
     builder.add(session)
 
-    for _, row in df_data.iterrows():
-        record = RecordMessage()
-        record.timestamp = int(row["TIMESTAMP"]) * 1000
-        record.heart_rate = int(row["HEART_RATE"])
-        builder.add(record)
+    record_timestamps = df_data["TIMESTAMP"].to_numpy(dtype=float).astype(np.int64) * 1000
+    record_heart_rates = df_data["HEART_RATE"].to_numpy().astype(np.int64)
+    new_record = RecordMessage
+    records = []
+    for timestamp_ms, heart_rate in zip(record_timestamps.tolist(), record_heart_rates.tolist()):
+        record = new_record()
+        record.timestamp = timestamp_ms
+        record.heart_rate = heart_rate
+        records.append(record)
+    add_all_with_layout(builder, records, RECORD_LAYOUT)
 
     activity = ActivityMessage()
     activity.timestamp = end_timestamp * 1000
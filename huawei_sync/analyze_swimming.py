@@ -3,6 +3,7 @@ from datetime import datetime
 from pathlib import Path
 from typing import Optional, Tuple, cast
 
+import numpy as np
 import pandas as pd
 from fit_tool.fit_file_builder import FitFileBuilder
 from fit_tool.profile.messages.activity_message import ActivityMessage
@@ -14,27 +15,67 @@ from fit_tool.profile.messages.record_message import RecordMessage
 from fit_tool.profile.messages.session_message import SessionMessage
 from fit_tool.profile.profile_type import Event, EventType, Sport, SubSport, SwimStroke
 
+from _fit import add_all_with_layout
+from _tables import fix_heart_rates, read_workout_csv
+
+
+# SPEED in the heart data is often unreliable for pool swimming; lengths are used instead
+HEART_DATA_COLUMNS = {"WORKOUT_ID", "TIMESTAMP", "HEART_RATE"}
+HEART_DATA_DTYPES = {"TIMESTAMP": "float64", "HEART_RATE": "float64"}
+RECORD_LAYOUT = ("timestamp", "heart_rate")
+SEGMENT_COLUMNS = {
+    "WORKOUT_ID",
+    "SEGMENT",
+    "SEGMENT_INDEX",
+    "TIME",
+    "DISTANCE",
+    "STROKES",
+    "SWIM_TYPE",
+}
+SUMMARY_COLUMNS = {
+    "WORKOUT_ID",
+    "DURATION",
+    "TOTAL_TIME",
+    "START_TIMESTAMP",
+    "END_TIMESTAMP",
+    "CALORIES",
+}
+
 
 def get_summary_total_time_seconds(df_summary: pd.DataFrame) -> Optional[float]:
     if df_summary.empty:
         return None
 
-    row = df_summary.iloc[0]
+    # Read first-row scalars per column instead of boxing the whole row as a Series
+    first_row = {
+        column_name: df_summary[column_name].iat[0]
+        for column_name in ("DURATION", "TOTAL_TIME", "START_TIMESTAMP", "END_TIMESTAMP")
+        if column_name in df_summary.columns
+    }
     for column_name in ("DURATION", "TOTAL_TIME"):
-        if column_name in row and pd.notna(row[column_name]):
-            return float(row[column_name])
+        if pd.notna(first_row.get(column_name)):
+            return float(first_row[column_name])
 
-    if (
-        "START_TIMESTAMP" in row
-        and "END_TIMESTAMP" in row
-        and pd.notna(row["START_TIMESTAMP"])
-        and pd.notna(row["END_TIMESTAMP"])
-    ):
-        return float(row["END_TIMESTAMP"] - row["START_TIMESTAMP"])
+    start_timestamp = first_row.get("START_TIMESTAMP")
+    end_timestamp = first_row.get("END_TIMESTAMP")
+    if pd.notna(start_timestamp) and pd.notna(end_timestamp):
+        return float(end_timestamp) - float(start_timestamp)
 
     return None
 
 
+def get_typical_length_time(length_times: np.ndarray) -> Optional[float]:
+    """60th percentile of the positive length times, or None if there are none."""
+    reference = length_times[length_times > 0]
+    if reference.size == 0:
+        return None
+
+    typical_length_time = float(np.quantile(reference, 0.6))
+    if typical_length_time <= 0:
+        typical_length_time = float(np.median(reference))
+    return typical_length_time
+
+
 def detect_sprint_session(
     df_segment_data: pd.DataFrame, workout_total_time_seconds: Optional[float]
 ) -> bool:
@@ -43,26 +84,18 @@ def detect_sprint_session(
     if active_count < 8 or active_count % 4 != 0:
         return False
 
-    times = active_segments["TIME"].astype(float)
-    reference = cast(pd.Series, times[times > 0])
-    if reference.empty:
+    length_times = active_segments["TIME"].to_numpy(dtype=float)
+    typical_length_time = get_typical_length_time(length_times)
+    if typical_length_time is None:
         return False
 
-    typical_length_time = float(reference.quantile(0.6))
-    if typical_length_time <= 0:
-        typical_length_time = float(reference.median())
-
     long_threshold = max(typical_length_time * 1.9, typical_length_time + 25.0)
 
     block_count = active_count // 4
-    boundary_long_count = 0
-    for block_idx in range(block_count - 1):
-        boundary_end_idx = block_idx * 4 + 3
-        boundary_next_idx = boundary_end_idx + 1
-        end_time = float(active_segments.iloc[boundary_end_idx]["TIME"])
-        next_time = float(active_segments.iloc[boundary_next_idx]["TIME"])
-        if max(end_time, next_time) >= long_threshold:
-            boundary_long_count += 1
+    # Compare the last length of each block of 4 with the first length of the next
+    boundary_end_idx = np.arange(block_count - 1) * 4 + 3
+    boundary_times = np.maximum(length_times[boundary_end_idx], length_times[boundary_end_idx + 1])
+    boundary_long_count = int(np.count_nonzero(boundary_times >= long_threshold))
 
     min_boundary_hits = max(1, int((block_count - 1) * 0.35))
     if boundary_long_count >= min_boundary_hits:
@@ -85,77 +118,77 @@ def add_sprint_rest_segments(df_segment_data: pd.DataFrame) -> pd.DataFrame:
     if active_count < 4:
         return cast(pd.DataFrame, active_segments.reset_index(drop=True))
 
-    times = active_segments["TIME"].astype(float)
-    reference = cast(pd.Series, times[times > 0])
-    if reference.empty:
+    original_times = active_segments["TIME"].to_numpy(dtype=float)
+    typical_length_time = get_typical_length_time(original_times)
+    if typical_length_time is None:
         return cast(pd.DataFrame, active_segments.reset_index(drop=True))
 
-    typical_length_time = float(reference.quantile(0.6))
-    if typical_length_time <= 0:
-        typical_length_time = float(reference.median())
-
     long_threshold = max(typical_length_time * 1.9, typical_length_time + 25.0)
     min_swim_time = max(8.0, typical_length_time * 0.45)
 
-    adjusted_times = [float(value) for value in active_segments["TIME"].tolist()]
-    before_rest = {}
-    after_rest = {}
+    adjusted_times = original_times.copy()
+    before_rest = np.zeros(active_count)
+    after_rest = np.zeros(active_count)
 
+    # Block boundaries never overlap, so every boundary is planned from the original
+    # times; only the fallback below needs the adjusted ones.
     block_count = active_count // 4
-    for block_idx in range(block_count - 1):
-        boundary_end_idx = block_idx * 4 + 3
-        boundary_next_idx = boundary_end_idx + 1
-
-        end_time = adjusted_times[boundary_end_idx]
-        next_time = adjusted_times[boundary_next_idx]
-
-        candidate_idx = boundary_end_idx if end_time >= next_time else boundary_next_idx
-        candidate_time = adjusted_times[candidate_idx]
-
-        detected_rest = 0.0
-        if candidate_time >= long_threshold:
-            detected_rest = candidate_time - typical_length_time
-            detected_rest = min(detected_rest, candidate_time - min_swim_time)
-            detected_rest = max(0.0, detected_rest)
-
-        if detected_rest >= 8.0:
-            adjusted_times[candidate_idx] = max(min_swim_time, candidate_time - detected_rest)
-            if candidate_idx == boundary_end_idx:
-                after_rest[boundary_end_idx] = after_rest.get(boundary_end_idx, 0.0) + detected_rest
-            else:
-                before_rest[boundary_next_idx] = before_rest.get(boundary_next_idx, 0.0) + detected_rest
-            continue
-
-        block_start = block_idx * 4
-        block_swim_time = sum(adjusted_times[block_start : block_start + 4])
-        fallback_rest = max(0.0, 180.0 - block_swim_time)
-        if fallback_rest >= 8.0:
-            after_rest[boundary_end_idx] = after_rest.get(boundary_end_idx, 0.0) + fallback_rest
-
-    transformed_rows = []
-    for index in range(active_count):
-        if index in before_rest and before_rest[index] > 0:
-            rest_template = active_segments.iloc[index].to_dict()
-            rest_template["TIME"] = before_rest[index]
-            rest_template["DISTANCE"] = 0
-            rest_template["STROKES"] = 0
-            rest_template["SWIM_TYPE"] = 0
-            transformed_rows.append(rest_template)
-
-        row = active_segments.iloc[index].to_dict()
-        row["TIME"] = adjusted_times[index]
-        transformed_rows.append(row)
-
-        if index in after_rest and after_rest[index] > 0:
-            rest_template = active_segments.iloc[index].to_dict()
-            rest_template["TIME"] = after_rest[index]
-            rest_template["DISTANCE"] = 0
-            rest_template["STROKES"] = 0
-            rest_template["SWIM_TYPE"] = 0
-            transformed_rows.append(rest_template)
-
-    result = pd.DataFrame(transformed_rows)
-    return result.reset_index(drop=True)
+    boundary_end_idx = np.arange(block_count - 1) * 4 + 3
+    boundary_next_idx = boundary_end_idx + 1
+    rest_after_end = original_times[boundary_end_idx] >= original_times[boundary_next_idx]
+    candidate_idx = np.where(rest_after_end, boundary_end_idx, boundary_next_idx)
+    candidate_times = original_times[candidate_idx]
+
+    detected_rest = np.where(
+        candidate_times >= long_threshold,
+        np.maximum(
+            0.0,
+            np.minimum(candidate_times - typical_length_time, candidate_times - min_swim_time),
+        ),
+        0.0,
+    )
+    has_rest = detected_rest >= 8.0
+    adjusted_times[candidate_idx[has_rest]] = np.maximum(
+        min_swim_time, candidate_times[has_rest] - detected_rest[has_rest]
+    )
+    after_rest[boundary_end_idx[has_rest & rest_after_end]] = detected_rest[
+        has_rest & rest_after_end
+    ]
+    before_rest[boundary_next_idx[has_rest & ~rest_after_end]] = detected_rest[
+        has_rest & ~rest_after_end
+    ]
+
+    blocks = adjusted_times[: (block_count - 1) * 4].reshape(-1, 4)
+    block_swim_times = blocks[:, 0] + blocks[:, 1] + blocks[:, 2] + blocks[:, 3]
+    fallback_rest = np.maximum(0.0, 180.0 - block_swim_times)
+    has_fallback = ~has_rest & (fallback_rest >= 8.0)
+    after_rest[boundary_end_idx[has_fallback]] = fallback_rest[has_fallback]
+
+    # Each output row copies an active segment; rest rows are split off either side.
+    has_before = before_rest > 0
+    has_after = after_rest > 0
+    keep_slots = np.column_stack((has_before, np.ones(active_count, dtype=bool), has_after))
+    slot_times = np.column_stack((before_rest, adjusted_times, after_rest))
+    slot_is_rest = np.column_stack((has_before, np.zeros(active_count, dtype=bool), has_after))
+    source_rows = np.repeat(np.arange(active_count), keep_slots.sum(axis=1))
+    output_times = slot_times[keep_slots]
+    rest_mask = slot_is_rest[keep_slots]
+
+    result = active_segments.take(source_rows).reset_index(drop=True)
+    result["TIME"] = output_times
+    if rest_mask.any():
+        for column_name in ("DISTANCE", "STROKES"):
+            values = result[column_name].to_numpy(copy=True)
+            values[rest_mask] = 0
+            result[column_name] = values
+        swim_types = (
+            result["SWIM_TYPE"].to_numpy(copy=True)
+            if "SWIM_TYPE" in result.columns
+            else np.full(len(result), np.nan)
+        )
+        swim_types[rest_mask] = 0
+        result["SWIM_TYPE"] = swim_types
+    return result
 
 
 def fix_collapsed_start_lengths(
@@ -189,31 +222,65 @@ def fix_collapsed_start_lengths(
     if first_time < inflated_threshold:
         return df_segment_data, False
 
-    template = df_segment_data.iloc[first_global_index].to_dict()
-
     split_times = [first_time / 3.0, first_time / 3.0, first_time - 2.0 * (first_time / 3.0)]
-    original_strokes = float(template.get("STROKES", 0) or 0)
+    original_strokes = float(first_active.get("STROKES", 0) or 0)
     split_strokes = [
         int(round(original_strokes / 3.0)),
         int(round(original_strokes / 3.0)),
         int(round(original_strokes - 2.0 * round(original_strokes / 3.0))),
     ]
 
-    transformed_rows = []
-    for index, (_, row) in enumerate(df_segment_data.iterrows()):
-        if index != first_global_index:
-            transformed_rows.append(row.to_dict())
-            continue
+    # Repeat the collapsed row three times in place, then overwrite the split columns.
+    source_rows = np.insert(
+        np.arange(len(df_segment_data)), first_global_index, [first_global_index] * 2
+    )
+    repaired_df = df_segment_data.take(source_rows).reset_index(drop=True)
+    split_rows = slice(first_global_index, first_global_index + 3)
+
+    times = repaired_df["TIME"].to_numpy(dtype=float, copy=True)
+    times[split_rows] = split_times
+    repaired_df["TIME"] = times
+    distances = repaired_df["DISTANCE"].to_numpy(copy=True)
+    distances[split_rows] = pool_length
+    repaired_df["DISTANCE"] = distances
+    strokes = repaired_df["STROKES"].to_numpy(copy=True)
+    strokes[split_rows] = [max(0, value) for value in split_strokes]
+    repaired_df["STROKES"] = strokes
+    return repaired_df, True
 
-        for split_idx in range(3):
-            repaired = dict(template)
-            repaired["TIME"] = split_times[split_idx]
-            repaired["DISTANCE"] = pool_length
-            repaired["STROKES"] = max(0, split_strokes[split_idx])
-            transformed_rows.append(repaired)
 
-    repaired_df = pd.DataFrame(transformed_rows).reset_index(drop=True)
-    return repaired_df, True
+def segment_heart_rate_stats(
+    heart_timestamps: np.ndarray,
+    heart_rates: np.ndarray,
+    segment_starts: np.ndarray,
+    segment_ends: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per-segment count, mean and max of heart rates sampled in [start, end]."""
+    segment_count = len(segment_starts)
+    if segment_count == 0 or len(heart_timestamps) == 0:
+        empty = np.zeros(segment_count)
+        return np.zeros(segment_count, dtype=np.int64), empty, empty
+
+    order = np.argsort(heart_timestamps, kind="stable")
+    sorted_timestamps = heart_timestamps[order]
+    sorted_rates = heart_rates[order]
+
+    lo = np.searchsorted(sorted_timestamps, segment_starts, side="left")
+    hi = np.searchsorted(sorted_timestamps, segment_ends, side="right")
+    counts = np.maximum(hi - lo, 0)
+
+    prefix_sums = np.concatenate(([0], np.cumsum(sorted_rates)))
+    means = np.divide(
+        prefix_sums[hi] - prefix_sums[lo],
+        counts,
+        out=np.zeros(segment_count),
+        where=counts > 0,
+    )
+
+    # reduceat over interleaved (lo, hi) bounds; the padding element keeps hi in range
+    bounds = np.column_stack((lo, hi)).ravel()
+    maxes = np.maximum.reduceat(np.append(sorted_rates, 0), bounds)[::2]
+    return counts, means, maxes
 
 
 def analyze_workout(workout_dir: Path, output_dir: Path, pool_length: int) -> Path:
@@ -235,26 +302,24 @@ def analyze_workout(workout_dir: Path, output_dir: Path, pool_length: int) -> Pa
     output_fname = output_dir / f"{workout_id}_swimming.fit"
 
     print("Reading data files...")
-    df_heart_data = pd.read_csv(raw_heart_fname)
-    df_segment_data = pd.read_csv(raw_segment_fname)
+    df_heart_data = read_workout_csv(
+        raw_heart_fname, int(workout_id), HEART_DATA_COLUMNS, HEART_DATA_DTYPES
+    )
+    df_segment_data = read_workout_csv(raw_segment_fname, int(workout_id), SEGMENT_COLUMNS)
     df_summary: pd.DataFrame = pd.DataFrame()
     if summary_fname.exists():
-        df_summary = cast(pd.DataFrame, pd.read_csv(summary_fname))
-
-    if "WORKOUT_ID" in df_heart_data.columns:
-        df_heart_data = df_heart_data[df_heart_data["WORKOUT_ID"] == int(workout_id)]
-    if "WORKOUT_ID" in df_segment_data.columns:
-        df_segment_data = df_segment_data[df_segment_data["WORKOUT_ID"] == int(workout_id)]
-    if not df_summary.empty and "WORKOUT_ID" in df_summary.columns:
-        workout_id_int = int(workout_id)
-        df_summary = cast(pd.DataFrame, df_summary.query("WORKOUT_ID == @workout_id_int"))
+        df_summary = read_workout_csv(summary_fname, int(workout_id), SUMMARY_COLUMNS)
 
     print(f"Processing {len(df_segment_data)} segments...")
-    df_segment_data = df_segment_data.groupby("SEGMENT").first().reset_index(drop=True)
+    # First row of each SEGMENT, ordered by (SEGMENT_INDEX, SEGMENT), in a single take
+    segments = df_segment_data["SEGMENT"].to_numpy()
+    _, first_rows = np.unique(segments, return_index=True)
+    sort_keys = [segments[first_rows]]
     if "SEGMENT_INDEX" in df_segment_data.columns:
-        sorted_idx = df_segment_data["SEGMENT_INDEX"].astype(float).sort_values().index
-        df_segment_data = df_segment_data.loc[sorted_idx].reset_index(drop=True)
-    df_segment_data = cast(pd.DataFrame, df_segment_data)
+        sort_keys.append(df_segment_data["SEGMENT_INDEX"].to_numpy()[first_rows])
+    df_segment_data = df_segment_data.take(first_rows[np.lexsort(sort_keys)]).reset_index(
+        drop=True
+    )
 
     df_segment_data, fixed_collapsed_start = fix_collapsed_start_lengths(
         df_segment_data, pool_length
@@ -274,32 +339,27 @@ def analyze_workout(workout_dir: Path, output_dir: Path, pool_length: int) -> Pa
         )
         df_segment_data = add_sprint_rest_segments(df_segment_data)
 
-    df_heart_data.loc[df_heart_data["HEART_RATE"] < 0, "HEART_RATE"] += 256
-    df_heart_data = df_heart_data[df_heart_data["HEART_RATE"] > 0]
+    df_heart_data = fix_heart_rates(df_heart_data)
     df_heart_data["TIMESTAMP"] = df_heart_data["TIMESTAMP"].astype(float)
     df_heart_data = df_heart_data[df_heart_data["TIMESTAMP"] > 631065600]
-    # speed in heart data is often unreliable for pool swimming; we'll rely on lengths
-    df_heart_data["SPEED_MS"] = df_heart_data["SPEED"] / 10.0
 
     if df_heart_data.empty:
         raise ValueError("No valid heart rate records found for swimming workout.")
 
     start_timestamp = df_heart_data["TIMESTAMP"].min()
 
-    cumulative_time = 0
-    segment_start_times = []
-    segment_end_times = []
-
-    for _, row in df_segment_data.iterrows():
-        segment_start_times.append(start_timestamp + cumulative_time)
-        cumulative_time += row["TIME"]
-        segment_end_times.append(start_timestamp + cumulative_time)
-
-    df_segment_data["START_TIMESTAMP"] = segment_start_times
-    df_segment_data["END_TIMESTAMP"] = segment_end_times
+    segment_times = df_segment_data["TIME"].to_numpy(dtype=float)
+    cumulative_times = np.cumsum(segment_times)
+    df_segment_data["START_TIMESTAMP"] = (
+        start_timestamp + np.concatenate(([0.0], cumulative_times))[:-1]
+    )
+    df_segment_data["END_TIMESTAMP"] = start_timestamp + cumulative_times
 
-    total_time = df_segment_data["TIME"].sum()
-    total_distance = df_segment_data["DISTANCE"].sum()
+    # Session totals come from the arrays already in hand rather than fresh column scans
+    distances = df_segment_data["DISTANCE"].to_numpy()
+    segment_distances = distances.astype(float)
+    total_time = float(cumulative_times[-1]) if cumulative_times.size else 0.0
+    total_distance = np.nansum(distances)
 
     # Check for "Practice Training" case
     # Condition: pool length 20m and pace < 1500 meters per hour
@@ -318,15 +378,16 @@ def analyze_workout(workout_dir: Path, output_dir: Path, pool_length: int) -> Pa
     max_speed = 0
 
     if not is_practice_training:
-        for _, row in df_segment_data.iterrows():
-            if row["TIME"] > 0:
-                segment_speed = row["DISTANCE"] / row["TIME"]
-                max_speed = max(max_speed, segment_speed)
+        moving = segment_times > 0
+        max_speed = float(
+            np.max(segment_distances[moving] / segment_times[moving], initial=0.0)
+        )
     else:
         max_speed = avg_speed
 
-    avg_heart_rate = int(df_heart_data["HEART_RATE"].mean()) if not df_heart_data.empty else 0
-    max_heart_rate = int(df_heart_data["HEART_RATE"].max()) if not df_heart_data.empty else 0
+    heart_rates = df_heart_data["HEART_RATE"].to_numpy()
+    avg_heart_rate = int(heart_rates.mean()) if heart_rates.size else 0
+    max_heart_rate = int(heart_rates.max()) if heart_rates.size else 0
 
     calories = int(total_time / 60 * 8)
     if not df_summary.empty and "CALORIES" in df_summary.columns:
@@ -362,90 +423,124 @@ def analyze_workout(workout_dir: Path, output_dir: Path, pool_length: int) -> Pa
     builder.add(device_info)
 
     # Add records before laps/lengths
-    for _, row in df_heart_data.iterrows():
-        if row["TIMESTAMP"] >= start_timestamp and row["TIMESTAMP"] <= (
-            start_timestamp + total_time
-        ):
-            record = RecordMessage()
-            record.timestamp = int(row["TIMESTAMP"] * 1000)
-            record.heart_rate = int(row["HEART_RATE"])
-            # We omit speed for pool swimming as it confuses Strava
-            builder.add(record)
+    heart_timestamps = df_heart_data["TIMESTAMP"].to_numpy(dtype=float)
+    in_workout = (heart_timestamps >= start_timestamp) & (
+        heart_timestamps <= start_timestamp + total_time
+    )
+    record_timestamps = (heart_timestamps[in_workout] * 1000).astype(np.int64)
+    record_heart_rates = heart_rates[in_workout].astype(np.int64)
+    new_record = RecordMessage
+    records = []
+    for timestamp_ms, heart_rate in zip(record_timestamps.tolist(), record_heart_rates.tolist()):
+        record = new_record()
+        record.timestamp = timestamp_ms
+        record.heart_rate = heart_rate
+        # We omit speed for pool swimming as it confuses Strava
+        records.append(record)
+    add_all_with_layout(builder, records, RECORD_LAYOUT)
 
     if not is_practice_training:
         print(
             f"Adding {len(df_segment_data)} lengths/laps and {len(df_heart_data)} heart rate records..."
         )
 
-        lap_hr_data = {}
-        for segment_idx, (_, row) in enumerate(df_segment_data.iterrows()):
-            segment_start = row["START_TIMESTAMP"]
-            segment_end = row["END_TIMESTAMP"]
-
-            segment_hr = df_heart_data[
-                (df_heart_data["TIMESTAMP"] >= segment_start)
-                & (df_heart_data["TIMESTAMP"] <= segment_end)
-            ]
-
-            if len(segment_hr) > 0:
-                lap_hr_data[segment_idx] = {
-                    "avg": int(segment_hr["HEART_RATE"].mean()),
-                    "max": int(segment_hr["HEART_RATE"].max()),
-                    "min": int(segment_hr["HEART_RATE"].min()),
-                }
-            else:
-                lap_hr_data[segment_idx] = {
-                    "avg": avg_heart_rate,
-                    "max": max_heart_rate,
-                    "min": 0,
-                }
-
-        for segment_idx, (_, row) in enumerate(df_segment_data.iterrows()):
+        segment_start_times = df_segment_data["START_TIMESTAMP"].to_numpy(dtype=float)
+        segment_end_times = df_segment_data["END_TIMESTAMP"].to_numpy(dtype=float)
+        segment_strokes = df_segment_data["STROKES"].to_numpy(dtype=float)
+        hr_counts, hr_means, hr_maxes = segment_heart_rate_stats(
+            heart_timestamps, heart_rates, segment_start_times, segment_end_times
+        )
+        # Segments without heart-rate samples fall back to the session values
+        has_lap_heart_rate = hr_counts > 0
+        lap_avg_heart_rates = np.where(
+            has_lap_heart_rate, hr_means.astype(np.int64), avg_heart_rate
+        )
+        lap_max_heart_rates = np.where(
+            has_lap_heart_rate, hr_maxes.astype(np.int64), max_heart_rate
+        )
+
+        # Per-segment message values, computed once for all segments
+        segment_start_ms = (segment_start_times * 1000).astype(np.int64)
+        segment_end_ms = (segment_end_times * 1000).astype(np.int64)
+        segment_stroke_counts = segment_strokes.astype(np.int64)
+        moving = segment_times > 0
+        segment_speeds = np.divide(
+            segment_distances, segment_times, out=np.zeros(len(segment_times)), where=moving
+        )
+        segment_cadences = np.divide(
+            segment_strokes, segment_times, out=np.zeros(len(segment_times)), where=moving
+        )
+        segment_cadences = (segment_cadences * 60).astype(np.int64)
+        segment_length_types = (segment_distances > 0).astype(np.int64)
+
+        # Lengths and laps alternate, so each one re-emits its definition and
+        # add_with_layout would never hit; bind add, the constructors and the enum
+        # members once instead
+        add = builder.add
+        new_length = LengthMessage
+        new_lap = LapMessage
+        freestyle = SwimStroke.FREESTYLE
+        length_event = Event.LENGTH
+        lap_event = Event.LAP
+        stop_event_type = EventType.STOP
+        for segment_idx, (
+            start_ms,
+            end_ms,
+            segment_time,
+            segment_distance,
+            stroke_count,
+            segment_speed,
+            cadence,
+            length_type,
+            lap_avg_heart_rate,
+            lap_max_heart_rate,
+        ) in enumerate(
+            zip(
+                segment_start_ms.tolist(),
+                segment_end_ms.tolist(),
+                segment_times.tolist(),
+                segment_distances.tolist(),
+                segment_stroke_counts.tolist(),
+                segment_speeds.tolist(),
+                segment_cadences.tolist(),
+                segment_length_types.tolist(),
+                lap_avg_heart_rates.tolist(),
+                lap_max_heart_rates.tolist(),
+            )
+        ):
             # In swimming FIT, LengthMessage usually precedes the LapMessage it belongs to.
-            length = LengthMessage()
-            length.timestamp = int(row["END_TIMESTAMP"] * 1000)
-            length.start_time = int(row["START_TIMESTAMP"] * 1000)
-            length.total_elapsed_time = row["TIME"]
-            length.total_timer_time = row["TIME"]
-            length.total_strokes = int(row["STROKES"])
-
-            length_speed = row["DISTANCE"] / row["TIME"] if row["TIME"] > 0 else 0
-            length.avg_speed = length_speed
-            
+            length = new_length()
+            length.timestamp = end_ms
+            length.start_time = start_ms
+            length.total_elapsed_time = segment_time
+            length.total_timer_time = segment_time
+            length.total_strokes = stroke_count
+            length.avg_speed = segment_speed
+
             # Stroke is always freestyle per user request
-            length.swim_stroke = SwimStroke.FREESTYLE
-
-            if row["TIME"] > 0:
-                length.avg_swimming_cadence = int((row["STROKES"] / row["TIME"]) * 60)
-            else:
-                length.avg_swimming_cadence = 0
-
-            length.length_type = 1 if row["DISTANCE"] > 0 else 0  # type: ignore[assignment]
-            length.event = Event.LENGTH
-            length.event_type = EventType.STOP
-            builder.add(length)
-
-            lap = LapMessage()
-            lap.timestamp = int(row["END_TIMESTAMP"] * 1000)
-            lap.start_time = int(row["START_TIMESTAMP"] * 1000)
-            lap.total_elapsed_time = row["TIME"]
-            lap.total_timer_time = row["TIME"]
-            lap.total_distance = row["DISTANCE"]
-
-            hr_stats = lap_hr_data.get(
-                segment_idx, {"avg": avg_heart_rate, "max": max_heart_rate, "min": 0}
-            )
-            lap.avg_heart_rate = hr_stats["avg"]
-            lap.max_heart_rate = hr_stats["max"]
-
-            lap.total_cycles = int(row["STROKES"])
-            lap_speed = row["DISTANCE"] / row["TIME"] if row["TIME"] > 0 else 0
-            lap.enhanced_avg_speed = lap_speed
-            lap.enhanced_max_speed = lap_speed
-            lap.event = Event.LAP
-            lap.event_type = EventType.STOP
+            length.swim_stroke = freestyle
+            length.avg_swimming_cadence = cadence
+            length.length_type = length_type  # type: ignore[assignment]
+            length.event = length_event
+            length.event_type = stop_event_type
+            add(length)
+
+            lap = new_lap()
+            lap.timestamp = end_ms
+            lap.start_time = start_ms
+            lap.total_elapsed_time = segment_time
+            lap.total_timer_time = segment_time
+            lap.total_distance = segment_distance
+            lap.avg_heart_rate = lap_avg_heart_rate
+            lap.max_heart_rate = lap_max_heart_rate
+
+            lap.total_cycles = stroke_count
+            lap.enhanced_avg_speed = segment_speed
+            lap.enhanced_max_speed = segment_speed
+            lap.event = lap_event
+            lap.event_type = stop_event_type
             lap.message_index = segment_idx
-            builder.add(lap)
+            add(lap)
     else:
         print("Practice training detected; skipping individual length/lap messages.")
         # We still add one lap for the whole session to keep the FIT file structure valid
@@ -7,6 +7,8 @@ import requests
 import json
 from pathlib import Path
 
+from _http import strava_session
+
 print("="*60)
 print("STRAVA OAUTH TOKEN GENERATOR")
 print("="*60)
@@ -71,7 +73,7 @@ print("="*60)
 print("\nRequesting access token from Strava...")
 
 try:
-    token_response = requests.post(
+    token_response = strava_session().post(
         'https://www.strava.com/oauth/token',
         data={
             'client_id': CLIENT_ID,
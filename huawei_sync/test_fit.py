@@ -0,0 +1,102 @@
+import unittest
+from unittest import mock
+
+from fit_tool.fit_file_builder import FitFileBuilder
+from fit_tool.profile.messages.file_id_message import FileIdMessage
+from fit_tool.profile.messages.lap_message import LapMessage
+from fit_tool.profile.messages.record_message import RecordMessage
+from fit_tool.profile.profile_type import FileType, Manufacturer
+
+import _fit
+from _fit import add_all_with_layout, add_with_layout
+
+START_MS = 1_700_000_000_000
+
+
+def file_id() -> FileIdMessage:
+    message = FileIdMessage()
+    message.type = FileType.ACTIVITY
+    message.manufacturer = Manufacturer.DEVELOPMENT.value
+    message.time_created = START_MS
+    return message
+
+
+def record(index: int, with_distance: bool) -> RecordMessage:
+    message = RecordMessage()
+    message.timestamp = START_MS + index * 1000
+    message.heart_rate = 90 + index % 60
+    if with_distance:
+        message.distance = index * 2.5
+    return message
+
+
+def lap(index: int) -> LapMessage:
+    message = LapMessage()
+    message.timestamp = START_MS + index * 1000
+    message.start_time = START_MS
+    message.total_elapsed_time = float(index)
+    return message
+
+
+def build_bytes(add_messages) -> bytes:
+    builder = FitFileBuilder(auto_define=True)
+    builder.add(file_id())
+    add_messages(builder)
+    return builder.build().to_bytes()
+
+
+class AddWithLayoutTest(unittest.TestCase):
+    """The definition-reuse fast path must encode exactly what ``builder.add`` does."""
+
+    def setUp(self):
+        # Exercise the fast path even on a fit_tool release that is not yet verified
+        from fit_tool.validation import validate_message_header
+
+        for name, value in (
+            ("REUSE_DEFINITIONS", True),
+            ("validate_message_header", validate_message_header),
+        ):
+            patcher = mock.patch.object(_fit, name, value, create=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_installed_fit_tool_is_verified(self):
+        from importlib.metadata import version
+
+        self.assertIn(version("fit-tool"), _fit.VERIFIED_FIT_TOOL_VERSIONS)
+
+    def test_add_with_layout_matches_builder_add(self):
+        # Layouts switch back and forth, with a lap in between, so the fast path
+        # has to notice when the active definition changes
+        layouts = [index % 7 < 4 for index in range(60)]
+
+        def plain(builder):
+            for index, with_distance in enumerate(layouts):
+                builder.add(record(index, with_distance))
+                if index == 30:
+                    builder.add(lap(index))
+
+        def with_layout(builder):
+            definitions = {}
+            for index, with_distance in enumerate(layouts):
+                add_with_layout(builder, record(index, with_distance), with_distance, definitions)
+                if index == 30:
+                    add_with_layout(builder, lap(index), "lap", definitions)
+
+        self.assertEqual(build_bytes(with_layout), build_bytes(plain))
+
+    def test_add_all_with_layout_matches_builder_add_all(self):
+        def plain(builder):
+            builder.add_all([record(index, False) for index in range(50)])
+            builder.add_all([record(index, True) for index in range(50, 80)])
+
+        def with_layout(builder):
+            definitions = {}
+            add_all_with_layout(builder, (record(index, False) for index in range(50)), False, definitions)
+            add_all_with_layout(builder, (record(index, True) for index in range(50, 80)), True, definitions)
+
+        self.assertEqual(build_bytes(with_layout), build_bytes(plain))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+import _tables
+from _tables import read_csv_columns
+
+
+def read_with_pandas(*args, **kwargs) -> pd.DataFrame:
+    with mock.patch.object(_tables, "pacsv", None):
+        return read_csv_columns(*args, **kwargs)
+
+
+class ReadCsvColumnsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.path = Path(self.tmp_dir.name) / "HUAWEI_WORKOUT_DATA_SAMPLE.csv"
+        self.path.write_text(
+            "ID,WORKOUT_ID,TIMESTAMP,HEART_RATE,SPEED\n"
+            "0,101,1700000000,-100,1.0\n"
+            "1,101,1700000005,,1.0\n"
+            "2,102,1700000010,120,2.0\n"
+        )
+
+    def test_no_requested_columns_gives_empty_frame(self):
+        frame = read_with_pandas(self.path, {"MISSING"})
+        self.assertTrue(frame.empty)
+        self.assertEqual(list(frame.columns), [])
+
+    def test_blank_heart_rate_reads_as_nan(self):
+        frame = read_with_pandas(
+            self.path, {"WORKOUT_ID", "HEART_RATE"}, {"HEART_RATE": "float64"}
+        )
+        self.assertEqual(list(frame.columns), ["WORKOUT_ID", "HEART_RATE"])
+        self.assertTrue(frame["HEART_RATE"].isna().iloc[1])
+
+    @unittest.skipIf(_tables.pacsv is None, "pyarrow is not installed")
+    def test_pyarrow_and_pandas_agree(self):
+        cases = [
+            ({"MISSING"}, None),
+            ({"WORKOUT_ID", "TIMESTAMP"}, None),
+            (
+                {"WORKOUT_ID", "TIMESTAMP", "HEART_RATE", "SPEED"},
+                {"TIMESTAMP": "float64", "HEART_RATE": "float64", "SPEED": "float32"},
+            ),
+        ]
+        for columns, dtypes in cases:
+            with self.subTest(columns=sorted(columns)):
+                pd.testing.assert_frame_equal(
+                    read_csv_columns(self.path, columns, dtypes),
+                    read_with_pandas(self.path, columns, dtypes),
+                    check_index_type=False,
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
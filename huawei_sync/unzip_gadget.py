@@ -1,8 +1,15 @@
 import json
+import os
+import shutil
+import threading
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Tuple
 
 
+EXTRACT_WORKERS = min(8, os.cpu_count() or 1)
+
 config_file = Path('file_config.json')
 
 if not config_file.exists():
@@ -14,5 +21,49 @@ if config_file.exists():
         ZIP_LOCATION = config.get('zip_location', '')
         UNZIP_LOCATION = config.get('unzip_location', '')
 
+# ZipFile handles are not safe to share between threads, so each worker opens its own;
+# they are all closed once extraction is done
+_thread_state = threading.local()
+_open_handles = []
+_open_handles_lock = threading.Lock()
+
+
+def member_path(info: zipfile.ZipInfo) -> Path:
+    """Destination of ``info`` under UNZIP_LOCATION; members that would land outside it are refused."""
+    unzip_root = Path(UNZIP_LOCATION).resolve()
+    target = (unzip_root / info.filename).resolve()
+    if not target.is_relative_to(unzip_root):
+        raise ValueError(f"Refusing to extract {info.filename!r} outside {unzip_root}")
+    return target
+
+
+def extract_member(member: Tuple[zipfile.ZipInfo, Path]) -> None:
+    info, target = member
+    zip_ref = getattr(_thread_state, 'zip_ref', None)
+    if zip_ref is None:
+        zip_ref = _thread_state.zip_ref = zipfile.ZipFile(ZIP_LOCATION, 'r')
+        with _open_handles_lock:
+            _open_handles.append(zip_ref)
+    # Members are copied to the path computed here rather than through ZipFile.extract,
+    # so the directory created with exist_ok is always the one written to and
+    # workers sharing a folder never race on makedirs
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with zip_ref.open(info) as source, open(target, 'wb') as destination:
+        shutil.copyfileobj(source, destination)
+
+
 with zipfile.ZipFile(ZIP_LOCATION, 'r') as zip_ref:
-    zip_ref.extractall(UNZIP_LOCATION)
+    # Every target is checked before anything is written
+    members = [(info, member_path(info)) for info in zip_ref.infolist() if not info.is_dir()]
+    # Empty directories in the archive have no file to create them
+    for info in zip_ref.infolist():
+        if info.is_dir():
+            zip_ref.extract(info, UNZIP_LOCATION)
+
+try:
+    with ThreadPoolExecutor(max_workers=EXTRACT_WORKERS) as executor:
+        # list() re-raises the first extraction error
+        list(executor.map(extract_member, members))
+finally:
+    for handle in _open_handles:
+        handle.close()
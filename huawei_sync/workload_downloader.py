@@ -4,17 +4,38 @@ import argparse
 import json
 import os
 import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping
 
 import pandas as pd
-from sqlalchemy import create_engine, inspect, text
+from sqlalchemy import create_engine, event, inspect, text
 
 
 SUMMARY_TABLE = "HUAWEI_WORKOUT_SUMMARY_SAMPLE"
 CONFIG_FILE_NAME = "file_config.json"
-
-
-def load_config() -> dict:
+DEFAULT_EXPORT_WORKERS = min(8, os.cpu_count() or 1)
+EXPORT_CHUNK_ROWS = 100_000
+# Written into a workout folder only after every table and gpx file has been saved
+EXPORT_COMPLETE_MARKER = ".export_complete"
+# Read-side tuning for bulk table scans: 64 MiB page cache, in-memory temp
+# tables for sorts, and up to 256 MiB of the database memory-mapped
+SQLITE_READ_PRAGMAS = (
+	"PRAGMA query_only=1",
+	"PRAGMA cache_size=-65536",
+	"PRAGMA temp_store=MEMORY",
+	"PRAGMA mmap_size=268435456",
+)
+
+_thread_state = threading.local()
+
+
+@lru_cache(maxsize=1)
+def load_config() -> Mapping:
+	"""Parse file_config.json once per run; the result is read-only since it is shared."""
 	config_file = Path(CONFIG_FILE_NAME)
 
 	if not config_file.exists():
@@ -26,7 +47,7 @@ def load_config() -> dict:
 		)
 
 	with config_file.open("r", encoding="utf-8") as config_handle:
-		return json.load(config_handle)
+		return MappingProxyType(json.load(config_handle))
 
 
 def resolve_db_path(cli_db_path: str | None) -> Path:
@@ -94,6 +115,29 @@ def resolve_gpx_dir() -> Path | None:
 	return None
 
 
+def create_read_only_engine(db_path: Path):
+	engine = create_engine(
+		f"sqlite:///{db_path}", connect_args={"check_same_thread": False}
+	)
+
+	@event.listens_for(engine, "connect")
+	def set_read_pragmas(dbapi_connection, _connection_record) -> None:
+		for pragma in SQLITE_READ_PRAGMAS:
+			dbapi_connection.execute(pragma)
+
+	return engine
+
+
+def get_thread_engine(db_path: Path):
+	"""Return this thread's read-only engine for ``db_path``, creating it on first use."""
+	engines = getattr(_thread_state, "engines", None)
+	if engines is None:
+		engines = _thread_state.engines = {}
+	if db_path not in engines:
+		engines[db_path] = create_read_only_engine(db_path)
+	return engines[db_path]
+
+
 def get_workout_tables(engine) -> list[str]:
 	db_inspector = inspect(engine)
 	tables = []
@@ -123,28 +167,39 @@ def get_workout_rows(engine) -> list[dict]:
 
 
 def workout_already_exported(workout_dir: Path) -> bool:
-	if not workout_dir.exists():
-		return False
-	return any(workout_dir.glob("*.csv"))
-
-
-def export_workout(engine, workout_id: int, workout_tables: list[str], output_dir: Path) -> int:
-	workout_dir = output_dir / str(workout_id)
-	workout_dir.mkdir(parents=True, exist_ok=True)
-
-	exported_files = 0
-	for table_name in workout_tables:
-		query = text(f"SELECT * FROM {table_name} WHERE WORKOUT_ID = :workout_id")
-		df_table = pd.read_sql_query(query, engine, params={"workout_id": workout_id})
-
-		if df_table.empty:
-			continue
-
-		output_file = workout_dir / f"{table_name}.csv"
-		df_table.to_csv(output_file, index=False)
-		exported_files += 1
-
-	return exported_files
+	# Loose csv files may be left over from an interrupted run; only the marker counts
+	return (workout_dir / EXPORT_COMPLETE_MARKER).is_file()
+
+
+def export_workout_table(
+	engine, table_name: str, workout_ids: set[int], output_dir: Path
+) -> set[int]:
+	"""Write one table's rows to ``<output_dir>/<workout_id>/<table_name>.csv``.
+
+	The table is scanned once and streamed in chunks; each chunk is split by
+	``WORKOUT_ID`` and appended to the matching workout's file, so rows keep their
+	table order. Returns the ids of the workouts that received rows.
+	"""
+	query = text(f"SELECT * FROM {table_name} WHERE WORKOUT_ID IS NOT NULL")
+	written_ids: set[int] = set()
+	with engine.connect() as connection, connection.begin():
+		for df_chunk in pd.read_sql_query(
+			query, connection, chunksize=EXPORT_CHUNK_ROWS, dtype_backend="numpy_nullable"
+		):
+			for workout_id, df_workout in df_chunk.groupby("WORKOUT_ID", sort=False):
+				workout_id = int(workout_id)
+				if workout_id not in workout_ids:
+					continue
+				first_write = workout_id not in written_ids
+				df_workout.to_csv(
+					output_dir / str(workout_id) / f"{table_name}.csv",
+					index=False,
+					mode="w" if first_write else "a",
+					header=first_write,
+				)
+				written_ids.add(workout_id)
+
+	return written_ids
 
 
 def copy_gpx_files(
@@ -195,6 +250,12 @@ def main() -> None:
 		default=None,
 		help="Directory where workout folders and csv files will be written.",
 	)
+	parser.add_argument(
+		"--workers",
+		type=int,
+		default=DEFAULT_EXPORT_WORKERS,
+		help=f"Number of tables exported concurrently (default {DEFAULT_EXPORT_WORKERS}).",
+	)
 	args = parser.parse_args()
 
 	db_path = resolve_db_path(args.db_path)
@@ -202,7 +263,7 @@ def main() -> None:
 	output_dir.mkdir(parents=True, exist_ok=True)
 	gpx_dir = resolve_gpx_dir()
 
-	engine = create_engine(f"sqlite:///{db_path}")
+	engine = create_read_only_engine(db_path)
 
 	workout_rows = get_workout_rows(engine)
 	if not workout_rows:
@@ -221,21 +282,45 @@ def main() -> None:
 	skipped = 0
 	exported = 0
 
+	pending_workouts = []
 	for workout in workout_rows:
 		workout_id = workout["workout_id"]
-		workout_number = workout["workout_number"]
 		workout_dir = output_dir / str(workout_id)
-		if False: #workout_already_exported(workout_dir):
+		if workout_already_exported(workout_dir):
 			print(f"Skipping workout {workout_id}: files already exist in {workout_dir}")
 			skipped += 1
 			continue
+		workout_dir.mkdir(parents=True, exist_ok=True)
+		pending_workouts.append(workout)
+
+	pending_ids = {workout["workout_id"] for workout in pending_workouts}
+
+	def export_table(table_name: str) -> set[int]:
+		return export_workout_table(
+			get_thread_engine(db_path), table_name, pending_ids, output_dir
+		)
 
-		print(f"Exporting workout {workout_id} (number={workout_number})...")
-		copied_gpx = copy_gpx_files(gpx_dir, workout_id, workout_number, workout_dir)
+	# Each table is read in a single scan rather than once per workout; tables write
+	# disjoint files, so every worker thread exports its own tables through its own engine.
+	# A workout only gets its completion marker once all tables are done, so an
+	# interrupted run leaves no marker and the partial folder is exported again.
+	exported_files: dict[int, int] = dict.fromkeys(pending_ids, 0)
+	if pending_ids:
+		with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+			for written_ids in executor.map(export_table, workout_tables):
+				for workout_id in written_ids:
+					exported_files[workout_id] += 1
+
+	for workout in pending_workouts:
+		workout_id = workout["workout_id"]
+		print(f"Exporting workout {workout_id} (number={workout['workout_number']})...")
+		copied_gpx = copy_gpx_files(
+			gpx_dir, workout_id, workout["workout_number"], output_dir / str(workout_id)
+		)
 		if copied_gpx:
 			print(f"  Copied {copied_gpx} gpx file(s)")
-		exported_files = export_workout(engine, workout_id, workout_tables, output_dir)
-		print(f"  Saved {exported_files} file(s)")
+		print(f"  Saved {exported_files[workout_id]} file(s)")
+		(output_dir / str(workout_id) / EXPORT_COMPLETE_MARKER).touch()
 		exported += 1
 
 	print(
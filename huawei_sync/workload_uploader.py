@@ -2,11 +2,20 @@ import requests
 import time
 import os
 import json
+import logging
 import sqlite3
 import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 
+from _http import strava_session
+
+logger = logging.getLogger(__name__)
+
 # ============================================================================
 # STRAVA API CONFIGURATION
 # ============================================================================
@@ -17,34 +26,60 @@ from pathlib import Path
 # 3. Note your Client ID and Client Secret
 # 4. Get an access token using OAuth or from your app settings
 
-# You can store these in environment variables or a config file
-STRAVA_CLIENT_ID = os.getenv('STRAVA_CLIENT_ID', '')
-STRAVA_CLIENT_SECRET = os.getenv('STRAVA_CLIENT_SECRET', '')
-STRAVA_ACCESS_TOKEN = os.getenv('STRAVA_ACCESS_TOKEN', '')
-
-# Or set them directly (not recommended for production):
-# STRAVA_CLIENT_ID = 'your_client_id'
-# STRAVA_CLIENT_SECRET = 'your_client_secret'
-# STRAVA_ACCESS_TOKEN = 'your_access_token'
-
-# Load from config file if it exists
-config_file = Path('strava_config.json')
-if config_file.exists():
-    with open(config_file, 'r') as f:
-        config = json.load(f)
-        STRAVA_CLIENT_ID = config.get('client_id', STRAVA_CLIENT_ID)
-        STRAVA_CLIENT_SECRET = config.get('client_secret', STRAVA_CLIENT_SECRET)
-        STRAVA_ACCESS_TOKEN = config.get('access_token', STRAVA_ACCESS_TOKEN)
-
-SYNC_DB_LOCATION = ""
-sync_config_file = Path('file_config.json')
-if not sync_config_file.exists():
-    sync_config_file = Path(r'huawei_sync\file_config.json')
-
-if sync_config_file.exists():
+# You can store these in environment variables (STRAVA_CLIENT_ID, STRAVA_CLIENT_SECRET,
+# STRAVA_ACCESS_TOKEN) or in strava_config.json, which takes precedence.
+# Both config files are read on first use, not at import.
+
+
+@lru_cache(maxsize=1)
+def load_strava_credentials():
+    credentials = {
+        'client_id': os.getenv('STRAVA_CLIENT_ID', ''),
+        'client_secret': os.getenv('STRAVA_CLIENT_SECRET', ''),
+        'access_token': os.getenv('STRAVA_ACCESS_TOKEN', ''),
+    }
+
+    # Load from config file if it exists
+    config_file = Path('strava_config.json')
+    if config_file.exists():
+        with open(config_file, 'r') as f:
+            config = json.load(f)
+        for key, value in credentials.items():
+            credentials[key] = config.get(key, value)
+    return credentials
+
+
+def get_access_token():
+    return load_strava_credentials()['access_token']
+
+
+@lru_cache(maxsize=1)
+def load_sync_db_location():
+    sync_config_file = Path('file_config.json')
+    if not sync_config_file.exists():
+        sync_config_file = Path(r'huawei_sync\file_config.json')
+
+    if not sync_config_file.exists():
+        return ""
     with open(sync_config_file, 'r') as f:
         sync_config = json.load(f)
-        SYNC_DB_LOCATION = sync_config.get('sync_db_location', '')
+    return sync_config.get('sync_db_location', '')
+
+# Uploads spend nearly all their time waiting on Strava, so a few run side by side
+DEFAULT_UPLOAD_WORKERS = 4
+
+# Successful upload statuses are written to the sync DB in batches of this size,
+# so a killed run loses at most this many records
+SYNC_STATUS_FLUSH_EVERY = 5
+
+# Upload status polling: delays grow 1.5x from the first delay up to the cap
+STATUS_POLL_FIRST_DELAY = 0.25
+STATUS_POLL_MAX_DELAY = 3.0
+STATUS_POLL_TIMEOUT_SECONDS = 60
+
+# Requests pause once this share of Strava's 15-minute request limit has been used
+RATE_LIMIT_HEADROOM = 0.9
+RATE_LIMIT_WINDOW_SECONDS = 15 * 60
 
 
 def resolve_sync_db_path(sync_db_location):
@@ -60,6 +95,12 @@ def resolve_sync_db_path(sync_db_location):
     return path / 'workout_sync.db'
 
 
+@lru_cache(maxsize=1)
+def get_sync_db_path():
+    """The configured sync DB path, resolved (and its directory created) once per run."""
+    return resolve_sync_db_path(load_sync_db_location())
+
+
 def parse_workout_id_from_path(file_path):
     stem = Path(file_path).stem
     workout_prefix = stem.split('_')[0]
@@ -133,35 +174,36 @@ def extract_duplicate_activity(error_text):
     }
 
 
+ACTIVITY_TYPES = {
+    "swimming": "Swim",
+    "cycling": "Ride",
+    "indoor_cycling": "Ride",
+    "indoor_running": "Run",
+    "strength": "WeightTraining",
+}
+
+
 def infer_activity_type(file_path):
-    stem = Path(file_path).stem.lower()
-
-    if stem.endswith("_swimming"):
-        return "Swim"
-    if stem.endswith("_cycling"):
-        return "Ride"
-    if stem.endswith("_indoor_cycling"):
-        return "Ride"
-    if stem.endswith("_indoor_running"):
-        return "Run"
-    if stem.endswith("_strength"):
-        return "WeightTraining"
+    # FIT files are named <workout_id>_<workout_type>; a type has at most one "_"
+    parts = Path(file_path).stem.lower().rsplit("_", 2)
+    suffixes = ["_".join(parts[1:]), parts[-1]] if len(parts) == 3 else parts[1:]
+    for suffix in suffixes:
+        if suffix in ACTIVITY_TYPES:
+            return ACTIVITY_TYPES[suffix]
 
     return "Workout"
 
 
 def infer_activity_type_from_workout_type(workout_type):
-    if workout_type == "swimming":
-        return "Swim"
-    if workout_type == "cycling":
-        return "Ride"
-    if workout_type == "indoor_cycling":
-        return "Ride"
-    if workout_type == "indoor_running":
-        return "Run"
-    if workout_type == "strength":
-        return "WeightTraining"
-    return "Workout"
+    return ACTIVITY_TYPES.get(workout_type, "Workout")
+
+
+if sys.version_info >= (3, 11):
+    # fromisoformat accepts the "Z" suffix written by analyze.py
+    parse_iso_datetime = datetime.fromisoformat
+else:
+    def parse_iso_datetime(iso_value):
+        return datetime.fromisoformat(iso_value.replace("Z", "+00:00"))
 
 
 def day_period_from_iso(iso_value):
@@ -169,7 +211,7 @@ def day_period_from_iso(iso_value):
         return "workout"
 
     try:
-        parsed = datetime.fromisoformat(str(iso_value).replace("Z", "+00:00"))
+        parsed = parse_iso_datetime(iso_value)
         hour = parsed.hour
         if 5 <= hour < 12:
             return "morning"
@@ -182,14 +224,16 @@ def day_period_from_iso(iso_value):
         return "workout"
 
 
+WORKOUT_LABELS = {
+    "swimming": "swim",
+    "cycling": "commute",
+    "indoor_running": "run",
+    "strength": "strength session",
+}
+
+
 def workout_label(workout_type):
-    mapping = {
-        "swimming": "swim",
-        "cycling": "commute",
-        "indoor_running": "run",
-        "strength": "strength session",
-    }
-    return mapping.get(workout_type, "workout")
+    return WORKOUT_LABELS.get(workout_type, "workout")
 
 
 def build_activity_name(workout_row):
@@ -231,7 +275,10 @@ def is_commute_workout(workout_row):
 
 def fetch_unsynced_workouts(connection):
 # ... (rest of fetch_unsynced_workouts unchanged)
-    cursor = connection.execute(
+    # sqlite3.Row keeps candidates as plain tuples; only uploadable rows become dicts
+    cursor = connection.cursor()
+    cursor.row_factory = sqlite3.Row
+    cursor.execute(
         """
         SELECT
             workout_id,
@@ -244,26 +291,42 @@ def fetch_unsynced_workouts(connection):
             fit_file_path
         FROM workouts
         WHERE strava_synced = 0
-        ORDER BY workout_id ASC
+        ORDER BY workout_id DESC
         """
     )
 
+    # List each FIT directory once instead of stat-ing every candidate file
+    existing_files = {}
     rows = []
-    columns = [column[0] for column in cursor.description]
-    for values in cursor.fetchall():
-        row = dict(zip(columns, values))
-        fit_file = row.get("fit_file_path")
-        if fit_file and Path(fit_file).exists():
-            rows.append(row)
-    return list(reversed(rows))
+    for row in cursor:
+        fit_file = row["fit_file_path"]
+        if not fit_file:
+            continue
+        fit_path = Path(fit_file)
+        if fit_path.parent not in existing_files:
+            existing_files[fit_path.parent] = list_file_names(fit_path.parent)
+        if fit_path.name in existing_files[fit_path.parent]:
+            rows.append(dict(row))
+    return rows
 
 
-def update_sync_status(file_path, upload_result):
-    sync_db_path = resolve_sync_db_path(SYNC_DB_LOCATION)
-    if sync_db_path is None:
+def list_file_names(directory):
+    try:
+        with os.scandir(directory) as entries:
+            return {entry.name for entry in entries if entry.is_file()}
+    except OSError:
+        return set()
+
+
+# Sync DB paths whose workouts table has been checked in this process
+_schema_checked_paths = set()
+
+
+def ensure_sync_schema(connection, sync_db_path):
+    """Create the workouts table if needed, once per sync DB path per process."""
+    if sync_db_path in _schema_checked_paths:
         return
 
-    connection = sqlite3.connect(sync_db_path)
     connection.execute(
         """
         CREATE TABLE IF NOT EXISTS workouts (
@@ -287,36 +350,54 @@ def update_sync_status(file_path, upload_result):
         )
         """
     )
+    _schema_checked_paths.add(sync_db_path)
+
+
+def update_sync_status(file_path, upload_result):
+    update_sync_statuses([(file_path, upload_result)])
+
 
-    workout_id = resolve_workout_id_for_file(connection, file_path)
-    if workout_id is None:
-        print(f"Warning: Could not find DB workout row for uploaded file: {file_path}")
-        connection.close()
+def update_sync_statuses(updates):
+    """Mark uploaded files as synced; ``updates`` holds (file_path, upload_result) pairs.
+
+    All updates are written in a single transaction.
+    """
+    sync_db_path = get_sync_db_path()
+    if sync_db_path is None or not updates:
         return
 
-    cursor = connection.execute(
-        """
-        UPDATE workouts
-        SET strava_synced = 1,
-            strava_activity_id = ?,
-            strava_activity_url = ?,
-            updated_at = CURRENT_TIMESTAMP
-        WHERE workout_id = ?
-        """,
-        (
-            upload_result.get('activity_id'),
-            upload_result.get('url'),
-            workout_id,
-        ),
-    )
-    if cursor.rowcount == 0:
-        print(f"Warning: Sync status update touched 0 rows for workout_id={workout_id}")
+    connection = sqlite3.connect(sync_db_path)
+    ensure_sync_schema(connection, sync_db_path)
+
+    for file_path, upload_result in updates:
+        workout_id = resolve_workout_id_for_file(connection, file_path)
+        if workout_id is None:
+            logger.warning("Could not find DB workout row for uploaded file: %s", file_path)
+            continue
+
+        cursor = connection.execute(
+            """
+            UPDATE workouts
+            SET strava_synced = 1,
+                strava_activity_id = ?,
+                strava_activity_url = ?,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE workout_id = ?
+            """,
+            (
+                upload_result.get('activity_id'),
+                upload_result.get('url'),
+                workout_id,
+            ),
+        )
+        if cursor.rowcount == 0:
+            logger.warning("Sync status update touched 0 rows for workout_id=%s", workout_id)
     connection.commit()
     connection.close()
 
 
 def mark_workout_handled(workout_id, synced_value, url_value=None):
-    sync_db_path = resolve_sync_db_path(SYNC_DB_LOCATION)
+    sync_db_path = get_sync_db_path()
     if sync_db_path is None:
         return
 
@@ -344,19 +425,21 @@ def mark_workout_handled(workout_id, synced_value, url_value=None):
 
 def check_access_token():
     """Verify that we have a valid access token"""
-    if not STRAVA_ACCESS_TOKEN:
-        print("\nERROR: No Strava access token found!")
-        print("\nTo upload to Strava, you need to:")
-        print("1. Create a Strava API app at: https://www.strava.com/settings/api")
-        print("2. Get your access token")
-        print("3. Either:")
-        print("   a) Set environment variable: STRAVA_ACCESS_TOKEN")
-        print("   b) Create strava_config.json with your credentials:")
-        print('      {')
-        print('        "client_id": "your_client_id",')
-        print('        "client_secret": "your_client_secret",')
-        print('        "access_token": "your_access_token"')
-        print('      }')
+    if not get_access_token():
+        logger.error(
+            "No Strava access token found!\n"
+            "\nTo upload to Strava, you need to:\n"
+            "1. Create a Strava API app at: https://www.strava.com/settings/api\n"
+            "2. Get your access token\n"
+            "3. Either:\n"
+            "   a) Set environment variable: STRAVA_ACCESS_TOKEN\n"
+            "   b) Create strava_config.json with your credentials:\n"
+            '      {\n'
+            '        "client_id": "your_client_id",\n'
+            '        "client_secret": "your_client_secret",\n'
+            '        "access_token": "your_access_token"\n'
+            '      }'
+        )
         return False
     return True
 
@@ -365,38 +448,104 @@ class StravaRateLimitError(Exception):
     pass
 
 
+# Latest 15-minute window usage reported by Strava, shared by all upload threads
+_rate_limit_lock = threading.Lock()
+# Held by the one worker sleeping out a nearly used window; the others queue on it
+_rate_limit_wait_lock = threading.Lock()
+_rate_limit_state = {'used': None, 'limit': None}
+
+
+def parse_rate_limit_header(value):
+    """First (15-minute) figure of a Strava "short,daily" rate limit header, or None."""
+    try:
+        return int(str(value).split(',')[0])
+    except ValueError:
+        return None
+
+
+def record_rate_limit(response):
+    """Remember the 15-minute usage Strava reports on an API response."""
+    used = parse_rate_limit_header(response.headers.get('X-RateLimit-Usage'))
+    limit = parse_rate_limit_header(response.headers.get('X-RateLimit-Limit'))
+    if used is None or not limit:
+        return
+    with _rate_limit_lock:
+        _rate_limit_state['used'] = used
+        _rate_limit_state['limit'] = limit
+
+
+def nearly_used_rate_limit():
+    """The recorded ``(used, limit)`` when the current window is past the headroom, else None."""
+    with _rate_limit_lock:
+        used = _rate_limit_state['used']
+        limit = _rate_limit_state['limit']
+    if used is None or used < limit * RATE_LIMIT_HEADROOM:
+        return None
+    return used, limit
+
+
+def wait_for_rate_limit_window():
+    """Sleep until the next 15-minute window when the current one is nearly used up.
+
+    Strava's short-term windows reset on the quarter hour, so below the headroom
+    there is no wait at all. Only the first worker to notice logs and sleeps; the
+    others block on the same wait and carry on once the window has reset.
+    """
+    if nearly_used_rate_limit() is None:
+        return
+
+    with _rate_limit_wait_lock:
+        # Another worker may have waited out the window while this one was queued
+        usage = nearly_used_rate_limit()
+        if usage is None:
+            return
+        used, limit = usage
+
+        wait_seconds = RATE_LIMIT_WINDOW_SECONDS - time.time() % RATE_LIMIT_WINDOW_SECONDS
+        logger.warning(
+            "Strava rate limit nearly reached (%s/%s); waiting %.0fs for the next window...",
+            used, limit, wait_seconds,
+        )
+        time.sleep(wait_seconds)
+        # Usage recorded during the sleep still belongs to the window that just ended
+        with _rate_limit_lock:
+            _rate_limit_state['used'] = None
+
+
 def mute_strava_activity(activity_id):
     """
     Mute an activity on Strava (hide from home feed)
     Requires a separate PUT request after upload is processed.
     """
-    if not STRAVA_ACCESS_TOKEN:
+    if not get_access_token():
         return False
     
     url = f"https://www.strava.com/api/v3/activities/{activity_id}"
     headers = {
-        'Authorization': f'Bearer {STRAVA_ACCESS_TOKEN}',
+        'Authorization': f'Bearer {get_access_token()}',
         'Content-Type': 'application/json'
     }
     # hide_from_home is the API parameter for "Mute Activity"
     data = {'hide_from_home': True}
     
     try:
-        print(f"Muting activity {activity_id} (hiding from home feed)...")
-        response = requests.put(url, headers=headers, json=data)
+        logger.info("Muting activity %s (hiding from home feed)...", activity_id)
+        wait_for_rate_limit_window()
+        response = strava_session().put(url, headers=headers, json=data)
+        record_rate_limit(response)
         if response.status_code == 429:
             raise StravaRateLimitError("Strava API rate limit exceeded during mute activity call.")
         response.raise_for_status()
-        print(f"Activity {activity_id} muted successfully.")
+        logger.info("Activity %s muted successfully.", activity_id)
         return True
     except StravaRateLimitError:
         raise
     except Exception as e:
-        print(f"Warning: Failed to mute activity {activity_id}: {e}")
+        logger.warning("Failed to mute activity %s: %s", activity_id, e)
         return False
 
 
-def upload_to_strava(file_path, activity_name=None, activity_type=None, description=None, is_private=False, is_commute=False, is_mute=False):
+def upload_to_strava(file_path, activity_name=None, activity_type=None, description=None, is_private=False, is_commute=False, is_mute=False, record_sync_status=True):
     """
     Upload a FIT file to Strava
     
@@ -408,6 +557,8 @@ def upload_to_strava(file_path, activity_name=None, activity_type=None, descript
         is_private: (Deprecated) Visibility follows user account defaults
         is_commute: Mark as a commute
         is_mute: Hide from home feed (requires an extra API call)
+        record_sync_status: Mark the workout as synced in the sync DB; batch callers
+            pass False and write statuses in batches with update_sync_statuses
     
     Returns:
         Dictionary with upload result and activity ID
@@ -418,26 +569,28 @@ def upload_to_strava(file_path, activity_name=None, activity_type=None, descript
 
     resolved_activity_type = activity_type or infer_activity_type(file_path)
     
-    # Check if file exists
-    if not os.path.exists(file_path):
-        print(f"Error: File not found: {file_path}")
+    # Opening the file doubles as the existence check
+    try:
+        fit_file = open(file_path, 'rb')
+    except FileNotFoundError:
+        logger.error("File not found: %s", file_path)
         return None
     
-    print(f"\nUploading {file_path} to Strava...")
-    print(f"Activity type: {resolved_activity_type}")
+    logger.info("Uploading %s to Strava...", file_path)
+    logger.info("Activity type: %s", resolved_activity_type)
     
     # Strava upload endpoint
     upload_url = 'https://www.strava.com/api/v3/uploads'
     
     # Prepare the request
     headers = {
-        'Authorization': f'Bearer {STRAVA_ACCESS_TOKEN}'
+        'Authorization': f'Bearer {get_access_token()}'
     }
     
     # Read the file
     response = None
 
-    with open(file_path, 'rb') as f:
+    with fit_file as f:
         files = {
             'file': (os.path.basename(file_path), f, 'application/octet-stream')
         }
@@ -455,18 +608,21 @@ def upload_to_strava(file_path, activity_name=None, activity_type=None, descript
         
         # Make the upload request
         try:
-            response = requests.post(upload_url, headers=headers, files=files, data=data)
+            wait_for_rate_limit_window()
+            response = strava_session().post(upload_url, headers=headers, files=files, data=data)
+            record_rate_limit(response)
             if response.status_code == 429:
                 raise StravaRateLimitError("Strava API rate limit exceeded during upload.")
             response.raise_for_status()
         except requests.exceptions.HTTPError as e:
-            print(f"Upload failed: {e}")
+            logger.error("Upload failed: %s", e)
             if response is not None:
-                print(f"Response: {response.text}")
+                logger.error("Response: %s", response.text)
                 duplicate_result = extract_duplicate_activity(response.text)
                 if duplicate_result:
-                    print("Duplicate upload detected; marking as synced to existing Strava activity.")
-                    update_sync_status(file_path, duplicate_result)
+                    logger.info("Duplicate upload detected; marking as synced to existing Strava activity.")
+                    if record_sync_status:
+                        update_sync_status(file_path, duplicate_result)
                     
                     # Even for duplicates, we might want to mute it if requested
                     if is_mute and duplicate_result.get('activity_id'):
@@ -475,129 +631,192 @@ def upload_to_strava(file_path, activity_name=None, activity_type=None, descript
                     return duplicate_result
             return None
         except requests.exceptions.RequestException as e:
-            print(f"Network error: {e}")
+            logger.error("Network error: %s", e)
             return None
     
     upload_data = response.json()
     upload_id = upload_data.get('id')
     
     if not upload_id:
-        print(f"Upload failed: {upload_data}")
+        logger.error("Upload failed: %s", upload_data)
         return None
     
-    print(f"Upload started (ID: {upload_id})")
-    print(f"Waiting for Strava to process the file...")
+    logger.info("Upload started (ID: %s)", upload_id)
+    logger.info("Waiting for Strava to process the file...")
     
-    # Poll for upload status
+    # The upload response already carries the first status; poll only while it is pending,
+    # checking again right away and then backing off
     status_url = f'https://www.strava.com/api/v3/uploads/{upload_id}'
-    max_attempts = 30
+    deadline = time.monotonic() + STATUS_POLL_TIMEOUT_SECONDS
+    status_data = upload_data
     attempt = 0
     
-    while attempt < max_attempts:
-        time.sleep(2)  # Wait 2 seconds between checks
+    while True:
+        activity_id = status_data.get('activity_id')
+        error = status_data.get('error')
+        status = status_data.get('status')
+        
+        if error:
+            logger.error("Upload error: %s", error)
+            duplicate_result = extract_duplicate_activity(error)
+            if duplicate_result:
+                duplicate_result['upload_id'] = upload_id
+                logger.info("Duplicate upload detected; marking as synced to existing Strava activity.")
+                if record_sync_status:
+                    update_sync_status(file_path, duplicate_result)
+                
+                if is_mute and duplicate_result.get('activity_id'):
+                    mute_strava_activity(duplicate_result['activity_id'])
+                    
+                return duplicate_result
+            return None
+        
+        if activity_id:
+            logger.info("Upload successful!")
+            logger.info("Activity ID: %s", activity_id)
+            logger.info("View at: https://www.strava.com/activities/%s", activity_id)
+            
+            # Mute the activity if requested
+            if is_mute:
+                mute_strava_activity(activity_id)
+            
+            result = {
+                'upload_id': upload_id,
+                'activity_id': activity_id,
+                'url': f'https://www.strava.com/activities/{activity_id}'
+            }
+            if record_sync_status:
+                update_sync_status(file_path, result)
+            return result
+        
+        if attempt:
+            logger.debug("   Status: %s (attempt %s)", status, attempt)
+            time.sleep(min(STATUS_POLL_FIRST_DELAY * 1.5 ** (attempt - 1), STATUS_POLL_MAX_DELAY))
+        if time.monotonic() >= deadline:
+            break
         attempt += 1
         
         try:
-            status_response = requests.get(status_url, headers=headers)
+            wait_for_rate_limit_window()
+            status_response = strava_session().get(status_url, headers=headers)
+            record_rate_limit(status_response)
             if status_response.status_code == 429:
                 raise StravaRateLimitError("Strava API rate limit exceeded during status polling.")
             status_response.raise_for_status()
             status_data = status_response.json()
-            
-            activity_id = status_data.get('activity_id')
-            error = status_data.get('error')
-            status = status_data.get('status')
-            
-            if error:
-                print(f"Upload error: {error}")
-                duplicate_result = extract_duplicate_activity(error)
-                if duplicate_result:
-                    duplicate_result['upload_id'] = upload_id
-                    print("Duplicate upload detected; marking as synced to existing Strava activity.")
-                    update_sync_status(file_path, duplicate_result)
-                    
-                    if is_mute and duplicate_result.get('activity_id'):
-                        mute_strava_activity(duplicate_result['activity_id'])
-                        
-                    return duplicate_result
-                return None
-            
-            if activity_id:
-                print(f"\nUpload successful!")
-                print(f"Activity ID: {activity_id}")
-                print(f"View at: https://www.strava.com/activities/{activity_id}")
-                
-                # Mute the activity if requested
-                if is_mute:
-                    mute_strava_activity(activity_id)
-                
-                result = {
-                    'upload_id': upload_id,
-                    'activity_id': activity_id,
-                    'url': f'https://www.strava.com/activities/{activity_id}'
-                }
-                update_sync_status(file_path, result)
-                return result
-            
-            print(f"   Status: {status} (attempt {attempt}/{max_attempts})")
-            
         except requests.exceptions.RequestException as e:
-            print(f"Error checking status: {e}")
+            logger.error("Could not check upload status: %s", e)
             return None
     
-    print(f"Upload timed out. Check Strava manually: https://www.strava.com/")
+    logger.warning("Upload timed out. Check Strava manually: https://www.strava.com/")
     return None
 
-def upload_multiple_files(file_pattern, activity_type=None):
+def run_uploads(upload_one, jobs, workers, on_finished):
+    """Run ``upload_one(job)`` for each ``(slot, job)`` pair on a thread pool.
+
+    ``on_finished(slot, result)`` is called in this thread as each upload completes.
+    If that loop is interrupted (Ctrl-C, or an error from ``on_finished``), uploads
+    that have not started are cancelled, the ones in flight are awaited and still
+    reported, and the original exception is re-raised.
+    """
+    executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    futures = {executor.submit(upload_one, job): slot for slot, job in jobs}
+    reported = set()
+    try:
+        for future in as_completed(futures):
+            reported.add(future)
+            on_finished(futures[future], future.result())
+    except BaseException:
+        executor.shutdown(wait=True, cancel_futures=True)
+        for future, slot in futures.items():
+            if future in reported or future.cancelled() or future.exception() is not None:
+                continue
+            try:
+                on_finished(slot, future.result())
+            except Exception as e:
+                logger.error("Could not record finished upload: %s", e)
+        raise
+    finally:
+        executor.shutdown(wait=True)
+
+def upload_multiple_files(file_pattern, activity_type=None, workers=DEFAULT_UPLOAD_WORKERS):
     """
     Upload multiple FIT files matching a pattern
     
     Args:
         file_pattern: Glob pattern for files (e.g., "output/*.fit")
         activity_type: Type of activity override for all files (None = infer per file)
+        workers: Number of uploads run concurrently
     """
     from glob import glob
     
     files = glob(file_pattern)
     
     if not files:
-        print(f"No files found matching: {file_pattern}")
+        logger.info("No files found matching: %s", file_pattern)
         return
     
-    print(f"\nFound {len(files)} file(s) to upload")
+    logger.info("Found %d file(s) to upload", len(files))
     
-    results = []
-    for file_path in files:
-        result = upload_to_strava(file_path, activity_type=activity_type)
-        results.append({
-            'file': file_path,
-            'result': result
-        })
-        
-        # Wait between uploads to avoid rate limiting
-        if len(files) > 1:
-            time.sleep(3)
+    rate_limited = threading.Event()
+
+    def upload_one(file_path):
+        # Once Strava rate-limits one upload, the ones not yet started are dropped
+        if rate_limited.is_set():
+            return None
+        try:
+            return upload_to_strava(file_path, activity_type=activity_type, record_sync_status=False)
+        except StravaRateLimitError as e:
+            if not rate_limited.is_set():
+                rate_limited.set()
+                logger.error("%s", e)
+                logger.error("Stopping uploads to respect Strava rate limits.")
+        except Exception as e:
+            logger.error("Upload failed for %s: %s", file_path, e)
+        return None
+
+    # Filled as uploads finish, but kept in input order for the summary
+    results = [{'file': file_path, 'result': None} for file_path in files]
+    pending_statuses = []
+    finished = 0
+
+    def on_finished(slot, result):
+        nonlocal finished
+        finished += 1
+        results[slot] = {'file': files[slot], 'result': result}
+        logger.info("Finished %d/%d: %s", finished, len(files), os.path.basename(files[slot]))
+        if result:
+            pending_statuses.append((files[slot], result))
+        if len(pending_statuses) >= SYNC_STATUS_FLUSH_EVERY:
+            update_sync_statuses(pending_statuses)
+            pending_statuses.clear()
+
+    try:
+        run_uploads(upload_one, enumerate(files), workers, on_finished)
+    finally:
+        # Whatever is left since the last batch, including uploads done before an error
+        update_sync_statuses(pending_statuses)
     
     # Summary
-    print("\n" + "="*60)
-    print("UPLOAD SUMMARY")
-    print("="*60)
+    logger.info("="*60)
+    logger.info("UPLOAD SUMMARY")
+    logger.info("="*60)
     successful = sum(1 for r in results if r['result'])
-    print(f"Successful: {successful}/{len(results)}")
+    logger.info("Successful: %d/%d", successful, len(results))
     
     for r in results:
         status = "[OK]" if r['result'] else "[FAIL]"
-        print(f"{status} {r['file']}")
+        logger.info("%s %s", status, r['file'])
         if r['result']:
-            print(f"   -> {r['result']['url']}")
+            logger.info("   -> %s", r['result']['url'])
     
     return results
 
 
-def upload_pending_from_db(activity_type_override=None):
-    sync_db_path = resolve_sync_db_path(SYNC_DB_LOCATION)
+def upload_pending_from_db(activity_type_override=None, workers=DEFAULT_UPLOAD_WORKERS):
+    sync_db_path = get_sync_db_path()
     if sync_db_path is None or not sync_db_path.exists():
-        print("Sync DB not found. Run analyze first to populate workouts.")
+        logger.info("Sync DB not found. Run analyze first to populate workouts.")
         return []
 
     connection = sqlite3.connect(sync_db_path)
@@ -605,19 +824,20 @@ def upload_pending_from_db(activity_type_override=None):
     connection.close()
 
     if not pending:
-        print("No unsynced workouts found in DB.")
+        logger.info("No unsynced workouts found in DB.")
         return []
 
-    print(f"Found {len(pending)} unsynced workout(s) in DB")
+    logger.info("Found %d unsynced workout(s) in DB", len(pending))
     results = []
     skipped = 0
+    uploads = []
 
     for workout_row in pending:
         file_path = workout_row["fit_file_path"]
         workout_id = workout_row.get("workout_id")
 
         if workout_row.get("workout_type") == "indoor_cycling":
-            print(f"\nSkipping indoor cycling workout_id={workout_id}: not uploaded to Strava.")
+            logger.info("Skipping indoor cycling workout_id=%s: not uploaded to Strava.", workout_id)
             mark_workout_handled(
                 workout_id,
                 -1,
@@ -627,6 +847,17 @@ def upload_pending_from_db(activity_type_override=None):
             skipped += 1
             continue
 
+        # Keep a slot so the summary stays in pending order
+        uploads.append((len(results), workout_row))
+        results.append(None)
+
+    rate_limited = threading.Event()
+
+    def upload_one(workout_row):
+        # Once Strava rate-limits one upload, the ones not yet started are dropped
+        if rate_limited.is_set():
+            return None
+
         resolved_type = (
             activity_type_override
             or infer_activity_type_from_workout_type(workout_row.get("workout_type"))
@@ -639,47 +870,72 @@ def upload_pending_from_db(activity_type_override=None):
         title = build_activity_name(workout_row)
         description = build_activity_description(workout_row)
 
-        print(f"\nUploading workout_id={workout_row.get('workout_id')} from DB...")
-        print(f"Title: {title}")
-        print(f"Type: {resolved_type}")
+        logger.info("Uploading workout_id=%s from DB...", workout_row.get("workout_id"))
+        logger.info("Title: %s", title)
+        logger.info("Type: %s", resolved_type)
         if is_commute:
-            print("Flags: commute, mute")
+            logger.info("Flags: commute, mute")
 
         try:
             result = upload_to_strava(
-                file_path,
+                workout_row["fit_file_path"],
                 activity_name=title,
                 activity_type=resolved_type,
                 description=description,
                 is_commute=is_commute,
                 is_mute=is_mute,
+                record_sync_status=False,
             )
-            results.append({"file": file_path, "result": result})
-
-            if result:
-                # Short pause between uploads
-                time.sleep(2)
         except StravaRateLimitError as e:
-            print(f"\nFATAL: {e}")
-            print("Stopping sync to respect Strava rate limits.")
-            break
+            if not rate_limited.is_set():
+                rate_limited.set()
+                logger.error("%s", e)
+                logger.error("Stopping sync to respect Strava rate limits.")
+            return None
+        except Exception as e:
+            logger.error("Upload failed for workout_id=%s: %s", workout_row.get("workout_id"), e)
+            result = None
+        return {"file": workout_row["fit_file_path"], "result": result}
+
+    pending_statuses = []
+    finished = 0
+
+    def on_finished(slot, item):
+        nonlocal finished
+        finished += 1
+        results[slot] = item
+        if item is not None:
+            logger.info("Finished %d/%d: %s", finished, len(uploads), os.path.basename(item["file"]))
+        if item and item["result"]:
+            pending_statuses.append((item["file"], item["result"]))
+        if len(pending_statuses) >= SYNC_STATUS_FLUSH_EVERY:
+            update_sync_statuses(pending_statuses)
+            pending_statuses.clear()
+
+    try:
+        run_uploads(upload_one, uploads, workers, on_finished)
+    finally:
+        # Whatever is left since the last batch, including uploads done before an error
+        update_sync_statuses(pending_statuses)
+
+    results = [item for item in results if item is not None]
 
-    print("\n" + "="*60)
-    print("DB UPLOAD SUMMARY")
-    print("="*60)
+    logger.info("="*60)
+    logger.info("DB UPLOAD SUMMARY")
+    logger.info("="*60)
     successful = sum(1 for item in results if item["result"])
     failed = sum(1 for item in results if not item.get("result") and not item.get("skipped"))
-    print(f"Successful: {successful}/{len(results)}")
+    logger.info("Successful: %d/%d", successful, len(results))
     if skipped:
-        print(f"Skipped by policy: {skipped}")
+        logger.info("Skipped by policy: %d", skipped)
     if failed:
-        print(f"Failed: {failed}")
+        logger.info("Failed: %d", failed)
 
     for item in results:
         status = "[SKIP]" if item.get("skipped") else ("[OK]" if item["result"] else "[FAIL]")
-        print(f"{status} {item['file']}")
+        logger.info("%s %s", status, item["file"])
         if item["result"]:
-            print(f"   -> {item['result']['url']}")
+            logger.info("   -> %s", item["result"]["url"])
 
     return results
 
@@ -700,17 +956,23 @@ if __name__ == "__main__":
     parser.add_argument('--pending-db', action='store_true', help='Upload all unsynced workouts from sync DB')
     parser.add_argument('--commute', action='store_true', help='Mark as commute')
     parser.add_argument('--mute', action='store_true', help='Mute activity (hide from home feed)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_UPLOAD_WORKERS,
+                        help=f'Number of uploads run concurrently (default: {DEFAULT_UPLOAD_WORKERS})')
+    parser.add_argument('--verbose', action='store_true', help='Also log every upload status poll')
     
     args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
+    if args.verbose:
+        logger.setLevel(logging.DEBUG)
     
-    print("="*60)
-    print("STRAVA FIT FILE UPLOADER")
-    print("="*60)
+    logger.info("="*60)
+    logger.info("STRAVA FIT FILE UPLOADER")
+    logger.info("="*60)
     
     if args.pending_db:
-        upload_pending_from_db(activity_type_override=args.type)
+        upload_pending_from_db(activity_type_override=args.type, workers=args.workers)
     elif args.multiple:
-        upload_multiple_files(args.multiple, activity_type=args.type)
+        upload_multiple_files(args.multiple, activity_type=args.type, workers=args.workers)
     else:
         upload_to_strava(
             args.file,
@@ -1,13 +1,18 @@
+import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from pathlib import Path
 
 SPEED = 34
 
 # path = r"C:\Users\tt_ro\Nextcloud\Gadgetbridge"
 path = r"C:\Users\Ties Robroek\Nextcloud\Gadgetbridge"
-db_path = f"{path}\Gadgetbridge.db"
+db_path = Path(path) / "Gadgetbridge.db"
 engine = create_engine(f"sqlite:///{db_path}")
-df_summary = pd.read_sql_table("HUAWEI_WORKOUT_SUMMARY_SAMPLE", engine)
+df_summary = pd.read_sql_query(
+    "SELECT * FROM HUAWEI_WORKOUT_SUMMARY_SAMPLE ORDER BY WORKOUT_ID DESC LIMIT 1",
+    engine,
+)
 
 
 ds_summary = df_summary.iloc[-1]
@@ -18,12 +23,15 @@ print(
 )
 
 df_data = pd.read_sql_query(
-    f"SELECT * FROM HUAWEI_WORKOUT_DATA_SAMPLE WHERE WORKOUT_ID = {ds_summary['WORKOUT_ID']}",
+    text(
+        "SELECT TIMESTAMP, HEART_RATE FROM HUAWEI_WORKOUT_DATA_SAMPLE "
+        "WHERE WORKOUT_ID = :workout_id AND HEART_RATE <> 0"
+    ),
     engine,
+    params={"workout_id": int(ds_summary["WORKOUT_ID"])},
 )
-df_data = df_data[["TIMESTAMP", "HEART_RATE"]]
-df_data.loc[df_data["HEART_RATE"] < 0, "HEART_RATE"] += 255
-df_data = df_data[df_data["HEART_RATE"] != 0]
+heart_rates = df_data["HEART_RATE"].to_numpy()
+df_data["HEART_RATE"] = np.where(heart_rates < 0, heart_rates + 255, heart_rates)
 
 total_duration = ds_summary["END_TIMESTAMP"] - ds_summary["START_TIMESTAMP"]
 total_calories = ds_summary["CALORIES"]
@@ -69,19 +77,30 @@ message.software_version = 1.0
 message.timestamp = int(ds_summary["START_TIMESTAMP"] * 1000)
 builder.add(message)
 
-for index, row in df_data.iterrows():
-    message = RecordMessage()
-    message.timestamp = int(row["TIMESTAMP"]) * 1000
-    message.heart_rate = int(row["HEART_RATE"])
-    message.calories = int(row["CALORIES"])
-
-    # Strava requires this
+timestamps = df_data["TIMESTAMP"].to_numpy()
+record_timestamps = timestamps.astype(np.int64) * 1000
+record_heart_rates = df_data["HEART_RATE"].to_numpy().astype(np.int64)
+record_calories = df_data["CALORIES"].to_numpy().astype(np.int64)
+# Strava requires a distance, so derive one from the constant SPEED
+record_distances = (
+    (timestamps - ds_summary["START_TIMESTAMP"]) * SPEED / 3.6
+).astype(np.int64)
+
+add_message = builder.add
+new_record = RecordMessage
+for timestamp_ms, heart_rate, calories, distance in zip(
+    record_timestamps.tolist(),
+    record_heart_rates.tolist(),
+    record_calories.tolist(),
+    record_distances.tolist(),
+):
+    message = new_record()
+    message.timestamp = timestamp_ms
+    message.heart_rate = heart_rate
+    message.calories = calories
     message.speed = SPEED
-    message.distance = int(
-        (row["TIMESTAMP"] - ds_summary["START_TIMESTAMP"]) * SPEED / 3.6
-    )
-
-    builder.add(message)
+    message.distance = distance
+    add_message(message)
 
 message = SessionMessage()
 message.timestamp = int(ds_summary["END_TIMESTAMP"] * 1000)
@@ -1,15 +1,21 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import bindparam, create_engine, text
 from pathlib import Path
 
 SPEED = 34
 TARGET_DISTANCE = 100
+# 25 m lengths needed to reach TARGET_DISTANCE
+LAP_LENGTHS = -(-TARGET_DISTANCE // 25)
+# The FIT file is built from the in-memory frames; raw CSV dumps are only for debugging
+EXPORT_RAW = False
 
 path = r"C:\Users\tt_ro\Nextcloud\Gadgetbridge\db"
 # path = r"C:\Users\Ties Robroek\Nextcloud\Gadgetbridge\db"
-db_path = f"{path}\Gadgetbridge.db"
+db_path = Path(path) / "Gadgetbridge.db"
 engine = create_engine(f"sqlite:///{db_path}")
-df_summary = pd.read_sql_table("HUAWEI_WORKOUT_SUMMARY_SAMPLE", engine)
 
 
 df_workout_ids = pd.read_sql_query(
@@ -18,33 +24,87 @@ df_workout_ids = pd.read_sql_query(
 )
 
 
-# for workout_id in df_workout_ids["WORKOUT_ID"]:
-for workout_id in [25]:
+# workout_ids = df_workout_ids["WORKOUT_ID"].tolist()
+workout_ids = [25]
+
+# One query per table for all workouts instead of one per workout
+df_summary = pd.read_sql_query(
+    text(
+        "SELECT WORKOUT_ID, START_TIMESTAMP, END_TIMESTAMP, CALORIES "
+        "FROM HUAWEI_WORKOUT_SUMMARY_SAMPLE WHERE WORKOUT_ID IN :ids"
+    ).bindparams(bindparam("ids", expanding=True)),
+    engine,
+    params={"ids": workout_ids},
+)
+summary_by_id = df_summary.set_index("WORKOUT_ID").sort_index()
+df_heart_all = pd.read_sql_query(
+    text(
+        "SELECT WORKOUT_ID, TIMESTAMP, HEART_RATE FROM HUAWEI_WORKOUT_DATA_SAMPLE "
+        "WHERE WORKOUT_ID IN :ids"
+    ).bindparams(bindparam("ids", expanding=True)),
+    engine,
+    params={"ids": workout_ids},
+)
+df_segment_all = pd.read_sql_query(
+    text(
+        "SELECT * FROM HUAWEI_WORKOUT_SWIM_SEGMENTS_SAMPLE WHERE WORKOUT_ID IN :ids AND TYPE = 0"
+    ).bindparams(bindparam("ids", expanding=True)),
+    engine,
+    params={"ids": workout_ids},
+)
+heart_by_workout = dict(tuple(df_heart_all.groupby("WORKOUT_ID", sort=False)))
+# First row per segment for every workout in one sorted groupby, instead of one per workout
+df_segment_first = (
+    df_segment_all.groupby(["WORKOUT_ID", "SEGMENT"])
+    .first()
+    .reset_index()
+    .reindex(columns=[column for column in df_segment_all.columns if column != "SEGMENT"])
+)
+segments_by_workout = dict(tuple(df_segment_first.groupby("WORKOUT_ID", sort=False)))
+
+
+def write_session(fit_file, fit_path, csv_path):
+    fit_file.to_file(fit_path)
+    fit_file.to_csv(csv_path)
+
+
+# A single writer thread saves each workout while the next one is being built;
+# the FIT and CSV for one workout are written in order, never concurrently
+writer = ThreadPoolExecutor(max_workers=1)
+pending_writes = []
+
+# One directory listing instead of an exists() check per workout
+try:
+    with os.scandir("sessions") as entries:
+        existing_sessions = {entry.name for entry in entries}
+except FileNotFoundError:
+    existing_sessions = set()
+
+for workout_id in workout_ids:
     print("WORKOUT_ID: ", workout_id)
     filename = f"sessions/{workout_id}_swimming."
     filename_fit = filename + "fit"
     filename_csv = filename + "csv"
 
-    if Path(filename_fit).exists():
+    if Path(filename_fit).name in existing_sessions:
         print(f"{filename_fit} exists")
         continue
 
-    ds_summary = df_summary.set_index("WORKOUT_ID").loc[workout_id]
+    ds_summary = summary_by_id.loc[workout_id]
 
-    df_heart_data = pd.read_sql_query(
-        f"SELECT * FROM HUAWEI_WORKOUT_DATA_SAMPLE WHERE WORKOUT_ID = {workout_id}",
-        engine,
-    )
+    df_heart_data = heart_by_workout.get(
+        workout_id, df_heart_all.iloc[:0]
+    ).reset_index(drop=True)
 
-    df_segment_data = pd.read_sql_query(
-        f"SELECT * FROM HUAWEI_WORKOUT_SWIM_SEGMENTS_SAMPLE WHERE WORKOUT_ID = {workout_id} AND TYPE = 0",
-        engine,
-    ).groupby("SEGMENT").first().reset_index(drop=True)
+    df_segment_data = segments_by_workout.get(
+        workout_id, df_segment_first.iloc[:0]
+    ).reset_index(drop=True)
 
-    raw_heart_fname = f"raw/{workout_id}_heart_swimming.csv"
-    raw_segment_fname = f"raw/{workout_id}_segments_swimming.csv"
-    df_heart_data.to_csv(raw_heart_fname, index=False)
-    df_segment_data.to_csv(raw_segment_fname, index=False)
+    if EXPORT_RAW:
+        raw_heart_fname = f"raw/{workout_id}_heart_swimming.csv"
+        raw_segment_fname = f"raw/{workout_id}_segments_swimming.csv"
+        df_heart_data.to_csv(raw_heart_fname, index=False)
+        df_segment_data.to_csv(raw_segment_fname, index=False)
 
 
 
@@ -66,91 +126,77 @@ for workout_id in [25]:
         df_segment_data.loc[2, "TIME"] = segment_time
 
 
-    def insert_row(df, index, row):
-        """
-        Inserts a row into a pandas DataFrame at the specified index,
-        shifting subsequent rows down and resetting the index to be numerical and increasing.
-        Args:
-            df (pd.DataFrame): The DataFrame to insert into.
-            index (int): The index at which to insert the row.
-            row (dict or pd.Series): The row data to insert.
-        Returns:
-            pd.DataFrame: The DataFrame with the new row inserted.
-        """
-        df = pd.concat([
-            df.iloc[:index],
-            pd.DataFrame([row]),
-            df.iloc[index:]
-        ]).reset_index(drop=True)
-        return df
-
-
-
     if df_segment_data["TIME"].std() > 8:
         # Probably a sprint session
         ################## Sprint Segment Fix
         # Add a pause after every 4 segments
+        # Inserts and swaps work on a list of row dicts; the frame is rebuilt once afterwards
+        rows = df_segment_data.to_dict("records")
         i = 0
         total_time = 0
         total_time_since = 0
         segments_since_last = 0
-        while i < len(df_segment_data) - 1:
-            print(i, len(df_segment_data))
-            total_time += df_segment_data.loc[i, "TIME"]
-            total_time_since += df_segment_data.loc[i, "TIME"]
+        while i < len(rows) - 1:
+            print(i, len(rows))
+            total_time += rows[i]["TIME"]
+            total_time_since += rows[i]["TIME"]
             segments_since_last += 1
             if total_time_since > 180:
                 if segments_since_last > 4:
                     pause_insert_loc = i - segments_since_last + 5
                     print("over", total_time_since)
-                    df_segment_data = insert_row(
-                        df_segment_data, pause_insert_loc, df_segment_data.loc[i].copy())
+                    rows.insert(pause_insert_loc, dict(rows[i]))
                     overtime = total_time_since - 180
-                    df_segment_data.loc[pause_insert_loc, "TIME"] -= overtime
-                    df_segment_data.loc[pause_insert_loc, "STROKES"] = 65535
-                    df_segment_data.loc[pause_insert_loc, "DISTANCE"] = 0
-                    df_segment_data.loc[i+1, "TIME"] = overtime
-                    total_time_since = 0#df_segment_data.loc[i+1, "TIME"]
+                    rows[pause_insert_loc]["TIME"] -= overtime
+                    rows[pause_insert_loc]["STROKES"] = 65535
+                    rows[pause_insert_loc]["DISTANCE"] = 0
+                    rows[i+1]["TIME"] = overtime
+                    total_time_since = 0#rows[i+1]["TIME"]
                     segments_since_last = 0
                 else: 
                     # Swap
-                    total_time -= df_segment_data.loc[i, "TIME"]
-                    total_time_since -= df_segment_data.loc[i, "TIME"]
+                    total_time -= rows[i]["TIME"]
+                    total_time_since -= rows[i]["TIME"]
 
                     # Swap rows i and i+1
-                    temp = df_segment_data.loc[i].copy()
-                    df_segment_data.loc[i] = df_segment_data.loc[i+1]
-                    df_segment_data.loc[i+1] = temp
+                    rows[i], rows[i+1] = rows[i+1], rows[i]
                     segments_since_last -= 1
                     continue
                 
             i += 1
 
+        df_segment_data = pd.DataFrame(rows, columns=df_segment_data.columns)
 
 
 
-    df_segment_data["AVG_SWOLF"] = df_segment_data["STROKES"] + df_segment_data["TIME"]
-    df_segment_data["PACE"] = 4*df_segment_data["TIME"]
 
-    pd.set_option('display.max_rows', 120)
-    df_segment_data.head(120)
+    df_segment_data = df_segment_data.assign(
+        AVG_SWOLF=df_segment_data["STROKES"] + df_segment_data["TIME"],
+        PACE=4*df_segment_data["TIME"],
+    )
 
     # TODO: figure out what the type = 1 data means
     # TODO: add pool length as data to session message
 
 
 
-    df_heart_data = df_heart_data[["TIMESTAMP", "HEART_RATE"]]
-    df_heart_data.loc[df_heart_data["HEART_RATE"] < 0, "HEART_RATE"] += 255
-    df_heart_data = df_heart_data[df_heart_data["HEART_RATE"] != 0]
-
     total_duration = ds_summary["END_TIMESTAMP"] - ds_summary["START_TIMESTAMP"]
     total_calories = ds_summary["CALORIES"]
-    calories_per_second = total_calories / total_duration
-
-    df_heart_data["CALORIES"] = (
-        df_heart_data["TIMESTAMP"] - ds_summary["START_TIMESTAMP"]
-    ) * calories_per_second
+    calories_per_second = total_calories / total_duration if total_duration > 0 else 0
+
+    # Missing readings would turn into garbage values in the integer cast below
+    df_heart_data = df_heart_data.dropna(subset=["HEART_RATE"])
+    # int16 like the analyzers' HEART_RATE dtype; wide enough for the +255 wrap fix
+    heart_rates = df_heart_data["HEART_RATE"].to_numpy().astype(np.int16)
+    heart_rates = np.where(heart_rates < 0, heart_rates + 255, heart_rates)
+    has_heart_rate = heart_rates != 0
+    heart_timestamps = df_heart_data["TIMESTAMP"].to_numpy()[has_heart_rate]
+    # Rebuilt in one go rather than filtered and then extended column by column
+    df_heart_data = pd.DataFrame({
+        "TIMESTAMP": heart_timestamps,
+        "HEART_RATE": heart_rates[has_heart_rate],
+        "CALORIES": (heart_timestamps - ds_summary["START_TIMESTAMP"]) * calories_per_second,
+    })
 
     # print(ds_summary)
 
@@ -170,13 +216,14 @@ for workout_id in [25]:
     )
 
     builder = FitFileBuilder(auto_define=True)
+    start_timestamp_ms = int(ds_summary["START_TIMESTAMP"] * 1000)
 
 
     message = FileIdMessage()
     message.type = 4
     message.manufacturer = 255
     message.product = 1
-    message.time_created = int(ds_summary["START_TIMESTAMP"] * 1000)
+    message.time_created = start_timestamp_ms
     message.serial_number = 0x1
     builder.add(message)
 
@@ -187,86 +234,147 @@ for workout_id in [25]:
     message.product_name = "Ties Huawei Strava Sync"
     message.serial_number = 0x1
     message.software_version = 1.0
-    message.timestamp = int(ds_summary["START_TIMESTAMP"] * 1000)
+    message.timestamp = start_timestamp_ms
     builder.add(message)
 
     ### Swimming data
-    lap_time = 0
-    lap_distance = 0
-
+    lengths = []
     laps = []
 
-    start_time = int(ds_summary["START_TIMESTAMP"] * 1000)
-    for index, row in df_segment_data.iterrows():
+    # Per-length values as plain arrays, so the loop never indexes the frame
+    segment_times = df_segment_data["TIME"].to_numpy().astype(np.int64)
+    segment_strokes = df_segment_data["STROKES"].to_numpy().astype(np.int64)
+    segment_distances = df_segment_data["DISTANCE"].to_numpy(dtype=float)
+    # Each length starts where the previous one ended
+    segment_start_times = (
+        start_timestamp_ms
+        + (np.cumsum(segment_times) - segment_times) * 1000
+    )
+    moving = segment_times > 0
+    segment_speeds = np.divide(
+        segment_distances,
+        df_segment_data["TIME"].to_numpy(dtype=float),
+        out=np.zeros_like(segment_distances),
+        where=moving,
+    )
+    is_active_length = segment_distances > 0
+    # Strokes per minute; rest lengths carry the 65535 STROKES sentinel and get 0
+    segment_cadences = np.divide(
+        segment_strokes * 60,
+        df_segment_data["TIME"].to_numpy(dtype=float),
+        out=np.zeros_like(segment_distances),
+        where=moving & is_active_length,
+    ).astype(np.int64)
+
+    length_event_types = is_active_length.astype(np.int64)  # 1 for active length
+    length_swim_strokes = np.where(is_active_length, 0, 255)
+
+    # A lap closes on every LAP_LENGTHS-th active length and spans the active
+    # time since the previous one; rest lengths get a lap of their own
+    is_rest = segment_distances < 1
+    active_counts = np.cumsum(~is_rest)
+    closes_lap = ~is_rest & (active_counts % LAP_LENGTHS == 0)
+    active_time = np.cumsum(np.where(is_rest, 0, segment_times))
+    lap_times = np.zeros_like(segment_times)
+    lap_times[closes_lap] = np.diff(active_time[closes_lap], prepend=0)
+
+    for index, (
+        length_time,
+        strokes,
+        start_time,
+        speed,
+        cadence,
+        event_type,
+        swim_stroke,
+        rest,
+        lap_time,
+    ) in enumerate(
+        zip(
+            segment_times.tolist(),
+            segment_strokes.tolist(),
+            segment_start_times.tolist(),
+            segment_speeds.tolist(),
+            segment_cadences.tolist(),
+            length_event_types.tolist(),
+            length_swim_strokes.tolist(),
+            is_rest.tolist(),
+            np.where(closes_lap, lap_times, -1).tolist(),
+        )
+    ):
         message = LengthMessage()
-        message.timestamp = int(ds_summary["START_TIMESTAMP"] * 1000)
+        message.timestamp = start_timestamp_ms
         message.start_time = start_time # TODO: fix for the skippy ones!!!
-        message.total_elapsed_time = int(row["TIME"])
-        message.total_timer_time = int(row["TIME"])
-        message.message_index = int(index)
-        message.total_strokes = int(row["STROKES"])
-        message.avg_speed = row["DISTANCE"] / row["TIME"]                  
+        message.total_elapsed_time = length_time
+        message.total_timer_time = length_time
+        message.message_index = index
+        message.total_strokes = strokes
+        message.avg_speed = speed
         message.event = 28
-        message.event_type = 1 if row["DISTANCE"] > 0 else 0  # 1 for active length
-        message.swim_stroke = 0 if row["DISTANCE"] > 0 else 255  # 1 for active length
-        message.avg_swim_cadence = int(row["STROKES"] / (row["TIME"] * 60))
+        message.event_type = event_type
+        message.swim_stroke = swim_stroke
+        message.avg_swim_cadence = cadence
         message.event_group = 255
         message.length_type = 1
-        builder.add(message)
+        lengths.append(message)
         
-        if row["DISTANCE"] < 1:
+        if rest:
             message = LapMessage()
-            message.timestamp = int(ds_summary["START_TIMESTAMP"] * 1000)
+            message.timestamp = start_timestamp_ms
             message.start_time = start_time
-            message.total_elapsed_time = int(row["TIME"])
+            message.total_elapsed_time = length_time
             message.total_distance = 0
             message.num_lengths = 0
-            message.total_timer_time = int(row["TIME"])
+            message.total_timer_time = length_time
             message.swim_stroke = 255
 
 
             laps.append(message)
-        else:
-            lap_time += int(row["TIME"])
-            lap_distance += 25
 
-        if lap_distance >= TARGET_DISTANCE:
+        if lap_time >= 0:
             message = LapMessage()
-            message.timestamp = int(ds_summary["START_TIMESTAMP"] * 1000)
+            message.timestamp = start_timestamp_ms
             message.start_time = start_time
             message.total_elapsed_time = lap_time
-            message.total_distance = lap_distance
-            message.num_lengths = int(lap_distance // 25)
+            message.total_distance = LAP_LENGTHS * 25
+            message.num_lengths = LAP_LENGTHS
             message.total_timer_time = lap_time
             message.swim_stroke = 0
-            lap_time = 0
-            lap_distance = 0
             # total cycles
             # total work
             # total_moving_time,4,bytes,time_standing,4,bytes,avg_left_power_phase,4,bytes,avg_left_power_phase_peak,4,bytes,avg_right_power_phase,4,bytes,avg_right_power_phase_peak,4,bytes,avg_power_position,4,bytes,max_power_position,4,bytes,enhanced_avg_speed,4,bytes,enhanced_max_speed,4,bytes,enhanced_avg_altitude,4,bytes,enhanced_min_altitude,4,bytes,enhanced_max_altitude,4,bytes,message_index,2,bytes,total_calories,2,bytes,total_fat_calories,2,bytes,avg_speed,2,bytes,max_speed,2,bytes,avg_power,2,bytes,max_power,2,bytes,total_ascent,2,bytes,total_descent,2,bytes,num_lengths,2,bytes,normalized_power,2,bytes,left_right_balance,2,bytes,first_length_index,2,bytes,avg_stroke_distance,2,bytes,num_active_lengths,2,bytes,wkt_step_index,2,bytes,avg_vertical_oscillation,2,bytes,avg_stance_time_percent,2,bytes,avg_stance_time,2,bytes,stand_count,2,bytes,avg_vertical_ratio,2,bytes,avg_stance_time_balance,2,bytes,avg_step_length,2,bytes,event,1,bytes,event_type,1,bytes,avg_heart_rate,1,bytes,max_heart_rate,1,bytes,avg_cadence,1,bytes,max_cadence,1,bytes,intensity,1,bytes,lap_trigger,1,bytes,sport,1,bytes,event_group,1,bytes,swim_stroke,1,bytes,sub_sport,1,bytes,avg_temperature,1,bytes,max_temperature,1,bytes,avg_fractional_cadence,1,bytes,max_fractional_cadence,1,bytes,total_fractional_cycles,1,bytes,avg_left_torque_effectiveness,1,bytes,avg_right_torque_effectiveness,1,bytes,avg_left_pedal_smoothness,1,bytes,avg_right_pedal_smoothness,1,bytes,avg_combined_pedal_smoothness,1,bytes,avg_left_pco,1,bytes,avg_right_pco,1,bytes,avg_cadence_position,2,bytes,max_cadence_position,2,bytes
             laps.append(message)
 
-        start_time += int(row["TIME"]) * 1000
-
     ### Swimming end
 
 
 
+    # Same order as before: every length, then every lap
+    builder.add_all(lengths)
     builder.add_all(laps)
 
 
 
 
-    for index, row in df_heart_data.iterrows():
-        message = RecordMessage()
-        message.timestamp = int(row["TIMESTAMP"]) * 1000
-        message.heart_rate = int(row["HEART_RATE"])
-        message.calories = int(row["CALORIES"])
-        builder.add(message)
+    # Some firmwares report only zero heart rates, which leaves no records to add
+    if not df_heart_data.empty:
+        # Cast once up front so the loop only assigns fields
+        record_timestamps = df_heart_data["TIMESTAMP"].to_numpy().astype(np.int64) * 1000
+        record_heart_rates = df_heart_data["HEART_RATE"].to_numpy().astype(np.int64)
+        record_calories = df_heart_data["CALORIES"].to_numpy().astype(np.int64)
+        records = []
+        for timestamp, heart_rate, calories in zip(
+            record_timestamps.tolist(), record_heart_rates.tolist(), record_calories.tolist()
+        ):
+            message = RecordMessage()
+            message.timestamp = timestamp
+            message.heart_rate = heart_rate
+            message.calories = calories
+            records.append(message)
+        builder.add_all(records)
 
     message = SessionMessage()
     message.timestamp = int(ds_summary["END_TIMESTAMP"] * 1000)
-    message.start_time = int(ds_summary["START_TIMESTAMP"] * 1000)
+    message.start_time = start_timestamp_ms
     message.total_elapsed_time = int(
         ds_summary["END_TIMESTAMP"] - ds_summary["START_TIMESTAMP"]
     )
@@ -284,5 +392,11 @@ for workout_id in [25]:
     builder.add(message)
 
     modified_file = builder.build()
-    modified_file.to_file(filename_fit)
-    modified_file.to_csv(filename_csv)
+    pending_writes.append(
+        writer.submit(write_session, modified_file, filename_fit, filename_csv)
+    )
+
+writer.shutdown(wait=True)
+# Re-raise the first write error, if any
+for write in pending_writes:
+    write.result()